@@ -0,0 +1,100 @@
+"""benchmarkbaseline.py
+
+Baseline handling shared by :mod:`benchmarkextraction` and
+:mod:`benchmarkstatistics`.
+
+A benchmark writes its results as JSON.  ``--baseline FILE --save-baseline``
+stores them, and a later run with ``--baseline FILE`` compares against them
+and exits with status 1 if a measure got worse by more than ``--tolerance``
+(relative) and by more than its minimum absolute delta.  Baselines are only
+comparable on the same machine and with the same settings.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Callable, Dict
+
+
+def add_arguments(parser: argparse.ArgumentParser, tolerance: float) -> None:
+    """Add ``--baseline``, ``--save-baseline`` and ``--tolerance`` to *parser*."""
+    parser.add_argument("--baseline", type=Path, help="Compare against this results JSON.")
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Write the results to --baseline."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=tolerance,
+        help="Relative worsening tolerated before a measure counts as regression.",
+    )
+
+
+def check_arguments(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """Reject ``--save-baseline`` without a ``--baseline`` to write to."""
+    if args.save_baseline and not args.baseline:
+        parser.error("--save-baseline needs --baseline FILE")
+
+
+def compare(
+    results: dict,
+    baseline: dict,
+    tolerance: float,
+    larger_is_better: Dict[str, bool],
+    min_delta: Dict[str, float] | None = None,
+    name: str = "",
+) -> list[str]:
+    """Return a message for every measure in *larger_is_better* that regressed.
+
+    A measure regresses when it got worse than in *baseline* by more than
+    *tolerance* times its old value and by more than its *min_delta*.  Every
+    comparison is logged, prefixed with *name*.
+    """
+    regressions = []
+    for measure, larger in larger_is_better.items():
+        old, new = baseline.get(measure), results.get(measure)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        worse = old - new if larger else new - old
+        regressed = worse > max(tolerance * abs(old), (min_delta or {}).get(measure, 0.0))
+        logging.info(
+            "%-48s %10.4f -> %10.4f (%+.1f%%) %s",
+            f"{name}{measure}",
+            old,
+            new,
+            100 * change,
+            "REGRESSION" if regressed else "ok",
+        )
+        if regressed:
+            regressions.append(f"{name}{measure}: {old:.4f} -> {new:.4f} ({100 * change:+.1f}%)")
+    return regressions
+
+
+def save_or_compare(
+    args: argparse.Namespace,
+    results: dict,
+    regressions_of: Callable[[dict], list[str]],
+) -> None:
+    """Store *results* with ``--save-baseline`` or check them against ``--baseline``.
+
+    *regressions_of* receives the loaded baseline and returns the regression
+    messages (see :func:`compare`).  Exits with status 1 on any regression.
+    """
+    if not args.baseline:
+        return
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2))
+        logging.info("Baseline saved to %s", args.baseline)
+        return
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("settings") != results.get("settings"):
+        logging.warning("Baseline was recorded with different settings")
+    regressions = regressions_of(baseline)
+    if regressions:
+        logging.error("Regressions against %s: %s", args.baseline, "; ".join(regressions))
+        sys.exit(1)
+    logging.info("No regression against %s", args.baseline)
@@ -0,0 +1,340 @@
+"""benchmarkextraction.py
+
+Throughput benchmark of the extraction pipeline on a CPU-only machine.
+
+Starts :mod:`mockllmserver` in a subprocess, writes synthetic reports and
+drives :func:`extractinformation.batch_analyse` against the mock.  It reports
+requests per second, latency percentiles from the telemetry sidecar and the
+CPU time the client spent per request.  The response cache is disabled so
+every report is a real round trip.
+
+``--mode`` selects the full reasoning, answer-only or early-stop request
+mode; ``--compare-modes`` runs all three against the same mock and reports
+the latency each of the fast modes saves per request.  Give the mock a
+``--seconds-per-token`` decode time so that shorter answers are faster.
+
+``--length-spread`` draws the report lengths from a lognormal distribution
+around ``--report-chars``; together with ``--prefill-seconds-per-token`` this
+shows the effect of ``--longest-first`` on the tail of the batch.
+``--context-tokens`` sets the per-slot context of the mock and lets the client
+split reports that would not fit.
+
+With ``--baseline`` the results are compared against an earlier run and the
+script exits with status 1 if throughput, tail latency or client CPU got
+worse by more than ``--tolerance``; ``--save-baseline`` stores the current
+results for later comparison.  Baselines are only comparable on the same
+machine and with the same settings.
+
+Usage
+-----
+$ python benchmarkextraction.py --reports 500 --concurrency 16 --slots 16 \
+    --latency lognormal --latency-mean 0.05 --baseline bench_baseline.json
+$ python benchmarkextraction.py --compare-modes --seconds-per-token 0.002
+$ python benchmarkextraction.py --length-spread 1.0 --prefill-seconds-per-token 0.0002 \
+    --context-tokens 2048 --longest-first
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import math
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+import pandas as pd
+
+import benchmarkbaseline
+import extractinformation as ei
+
+# ---------------------------------------------------------------------------
+# CONSTANTS ------------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+MOCK_SERVER = Path(__file__).with_name("mockllmserver.py")
+SERVER_START_TIMEOUT = 10.0  # seconds
+
+# request mode -> batch_analyse keyword arguments
+MODES = {
+    "full": {},
+    "answer-only": {"answer_only": True},
+    "early-stop": {"early_stop": True},
+}
+
+# metric -> True if larger is better; checked against the baseline
+COMPARED_METRICS = {
+    "requests_per_s": True,
+    "latency_p99_s": False,
+    "client_cpu_ms_per_request": False,
+}
+
+REPORT_SENTENCES = [
+    "Der Patient berichtet über anhaltende Niedergeschlagenheit.",
+    "Seit Wochen bestehen Ein- und Durchschlafstörungen.",
+    "Die Patientin wirkt im Kontakt freundlich zugewandt.",
+    "Es werden Zukunftsängste und Grübelneigung geschildert.",
+    "Ein regelmäßiger Alkoholkonsum wird verneint.",
+    "Suizidgedanken werden glaubhaft verneint.",
+    "Der Antrieb ist vermindert, die Konzentration herabgesetzt.",
+    "Keine Hinweise auf formale oder inhaltliche Denkstörungen.",
+]
+
+# ---------------------------------------------------------------------------
+# HELPERS --------------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+
+def write_reports(
+    path: Path, n_reports: int, report_chars: int, seed: int = 0, spread: float = 0.0
+) -> None:
+    """Write *n_reports* synthetic German anamnesis texts to a CSV at *path*.
+
+    With a *spread* the lengths are lognormal with that sigma and a mean of
+    *report_chars*; otherwise every report is about *report_chars* long.
+    """
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n_reports):
+        length = report_chars
+        if spread:
+            length = int(rng.lognormvariate(math.log(report_chars) - spread**2 / 2, spread))
+        sentences: list[str] = []
+        while sum(len(s) + 1 for s in sentences) < length:
+            sentences.append(rng.choice(REPORT_SENTENCES))
+        rows.append({"id": f"R{i:05d}", "report": " ".join(sentences)})
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_mock_server(port: int, server_args: list[str]) -> subprocess.Popen:
+    """Launch the mock server and wait until its ``/health`` route answers."""
+    process = subprocess.Popen(
+        [sys.executable, str(MOCK_SERVER), "--port", str(port), "--log-level", "WARNING"]
+        + server_args
+    )
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1):
+                return process
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError("mock server exited during start-up")
+            time.sleep(0.05)
+    process.terminate()
+    raise RuntimeError(f"mock server did not answer within {SERVER_START_TIMEOUT}s")
+
+
+def run_mode(args: argparse.Namespace, mode: str, tmp: Path) -> dict:
+    """Run batch_analyse once in *mode* against the configured mock."""
+    input_path = tmp / "reports.csv"
+    output_path = tmp / f"results_{mode}.csv"
+    if not input_path.exists():
+        write_reports(
+            input_path, args.reports, args.report_chars, args.seed, args.length_spread
+        )
+
+    # pipeline logging would be part of what is measured; keep it quiet
+    logging.getLogger().setLevel(logging.WARNING)
+    wall, cpu = time.perf_counter(), time.process_time()
+    ei.batch_analyse(
+        input_path,
+        output_path,
+        model="mock",
+        conditions=args.conditions,
+        multi_condition=args.multi_condition,
+        concurrency=args.concurrency,
+        cache=None,
+        stream=args.stream,
+        longest_first=args.longest_first,
+        context_tokens=args.context_tokens,
+        **MODES[mode],
+    )
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    logging.getLogger().setLevel(args.log_level)
+    return summarise(ei.TelemetryLog.path_for(output_path), wall, cpu)
+
+
+def summarise(telemetry_path: Path, wall_s: float, cpu_s: float) -> dict:
+    """Benchmark figures from the telemetry sidecar of one run."""
+    records = pd.read_json(telemetry_path, lines=True)
+    n = len(records)
+    results = {
+        "requests": n,
+        "errors": int(records["error"].notna().sum()),
+        "retries": int(records["retries"].sum()),
+        "wall_s": wall_s,
+        "requests_per_s": n / wall_s if wall_s else 0.0,
+        "client_cpu_s": cpu_s,
+        "client_cpu_ms_per_request": 1000 * cpu_s / n if n else 0.0,
+        "latency_mean_s": float(records["latency_s"].mean()),
+    }
+    for q in (50, 95, 99):
+        results[f"latency_p{q}_s"] = float(records["latency_s"].quantile(q / 100))
+        results[f"queue_wait_p{q}_s"] = float(records["queue_wait_s"].quantile(q / 100))
+    if records["ttfb_s"].notna().any():
+        results["ttfb_p50_s"] = float(records["ttfb_s"].quantile(0.5))
+    return results
+
+
+# ---------------------------------------------------------------------------
+# ENTRY POINT ----------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark batch_analyse against the offline mock LLM server."
+    )
+    parser.add_argument("--reports", type=int, default=200, help="Synthetic reports to analyse.")
+    parser.add_argument(
+        "--report-chars", type=int, default=2000, help="Approximate length of every report."
+    )
+    parser.add_argument(
+        "--length-spread",
+        type=float,
+        default=0.0,
+        help="Sigma of lognormal report lengths (0: all reports equally long).",
+    )
+    parser.add_argument("--concurrency", type=int, default=8, help="Client concurrency.")
+    parser.add_argument(
+        "--conditions",
+        nargs="+",
+        default=["Depression"],
+        help="Conditions asked about per report.",
+    )
+    parser.add_argument("--multi-condition", action="store_true")
+    parser.add_argument("--stream", action="store_true", help="Use streamed responses.")
+    parser.add_argument(
+        "--mode", choices=list(MODES), default="full", help="Request mode to benchmark."
+    )
+    parser.add_argument(
+        "--compare-modes",
+        action="store_true",
+        help="Run every mode and report the latency saved against full reasoning.",
+    )
+    parser.add_argument(
+        "--longest-first", action="store_true", help="Send the longest reports first."
+    )
+    parser.add_argument(
+        "--context-tokens",
+        type=int,
+        help="Per-slot context of the mock; the client splits longer reports.",
+    )
+    parser.add_argument("--slots", type=int, default=8, help="Parallel slots of the mock.")
+    parser.add_argument(
+        "--latency", choices=["fixed", "exponential", "lognormal"], default="fixed"
+    )
+    parser.add_argument("--latency-mean", type=float, default=0.05)
+    parser.add_argument(
+        "--seconds-per-token",
+        type=float,
+        default=0.0,
+        help="Decode time of the mock per generated token.",
+    )
+    parser.add_argument(
+        "--prefill-seconds-per-token",
+        type=float,
+        default=0.0,
+        help="Prompt processing time of the mock per prompt token.",
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0, help="Seed for reports and mock server.")
+    parser.add_argument("--results", type=Path, help="Write the results as JSON to this file.")
+    benchmarkbaseline.add_arguments(parser, tolerance=0.15)
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="Logging verbosity",
+    )
+    args = parser.parse_args()
+    benchmarkbaseline.check_arguments(parser, args)
+    if args.compare_modes and args.baseline:
+        parser.error("--compare-modes cannot be checked against a --baseline; use --mode")
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level, format="%(levelname)s: %(message)s")
+    port = free_port()
+    server = start_mock_server(
+        port,
+        [
+            "--slots", str(args.slots),
+            "--latency", args.latency,
+            "--latency-mean", str(args.latency_mean),
+            "--seconds-per-token", str(args.seconds_per_token),
+            "--prefill-seconds-per-token", str(args.prefill_seconds_per_token),
+            *(["--context-tokens", str(args.context_tokens)] if args.context_tokens else []),
+            "--error-rate", str(args.error_rate),
+            "--seed", str(args.seed),
+        ],
+    )
+    modes = list(MODES) if args.compare_modes else [args.mode]
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            ei.configure_openai(api_base=f"http://127.0.0.1:{port}/v1", api_key="mock")
+            by_mode = {mode: run_mode(args, mode, Path(tmp)) for mode in modes}
+    finally:
+        server.terminate()
+        server.wait()
+
+    if args.compare_modes:
+        full = by_mode["full"]["latency_mean_s"]
+        for mode, mode_results in by_mode.items():
+            saved = full - mode_results["latency_mean_s"]
+            mode_results["latency_saved_vs_full_s"] = saved
+            logging.info(
+                "%-12s %7.2f req/s  mean latency %.4fs  p99 %.4fs  saved vs full %.4fs (%.0f%%)",
+                mode,
+                mode_results["requests_per_s"],
+                mode_results["latency_mean_s"],
+                mode_results["latency_p99_s"],
+                saved,
+                100 * saved / full if full else 0.0,
+            )
+        if args.results:
+            args.results.write_text(json.dumps(by_mode, indent=2))
+        return
+
+    results = by_mode[args.mode]
+
+    results["settings"] = {
+        key: getattr(args, key)
+        for key in (
+            "reports", "report_chars", "length_spread", "concurrency", "conditions", "multi_condition",
+            "stream", "mode", "longest_first", "context_tokens", "slots", "latency",
+            "latency_mean", "seconds_per_token", "prefill_seconds_per_token", "error_rate",
+            "seed",
+        )
+    }
+    for key, value in results.items():
+        if key != "settings":
+            logging.info("%-28s %s", key, f"{value:.4f}" if isinstance(value, float) else value)
+    if args.results:
+        args.results.write_text(json.dumps(results, indent=2))
+
+    benchmarkbaseline.save_or_compare(
+        args,
+        results,
+        lambda baseline: benchmarkbaseline.compare(
+            results, baseline, args.tolerance, COMPARED_METRICS
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""benchmarkstatistics.py
+
+Scaling benchmark of the statistics pipeline on synthetic data.
+
+For every combination of ``--patients``, ``--domains``, ``--prompts``,
+``--runs`` and ``--iterations`` a data set is written with
+:func:`generatesyntheticdata.generate` and :mod:`statisticalanalysis` is run
+on it stage by stage:
+
+* ``load``        – parse every run*/ CSV and join the ground truth
+* ``load_cached`` – the same from a warm ``.predictions_cache.parquet``
+* ``encode``      – build the patients × groups indicator matrix
+* ``point``       – point estimates, best/worst selection, prompt pairs
+* ``bootstrap``   – CI limits and sign counts of all replicates
+* ``pvalues``     – best/worst and pairwise p-values, BH, result table
+
+Each stage reports its wall time (the minimum over ``--repeat`` runs) and
+the peak memory it allocated, as traced by :mod:`tracemalloc` in this
+process (bootstrap workers started with ``--workers`` are not included).
+
+With ``--baseline`` the results are compared against an earlier run and the
+script exits with status 1 if a stage got slower or needed more memory by
+more than ``--tolerance``; ``--save-baseline`` stores the current results.
+Baselines are only comparable on the same machine and with the same grid.
+
+Usage
+-----
+$ python benchmarkstatistics.py --patients 300 3000 --prompts 4 20 \
+    --domains 3 12 --iterations 2000 --baseline stats_baseline.json
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import logging
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import benchmarkbaseline
+import generatesyntheticdata as gen
+import statisticalanalysis as sa
+
+# ---------------------------------------------------------------------------
+# CONSTANTS ------------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+STAGES = ["load", "load_cached", "encode", "point", "bootstrap", "pvalues"]
+
+# measure -> smallest absolute worsening that can count as regression; keeps
+# millisecond stages from failing the comparison on timer noise
+MIN_DELTA = {"seconds": 0.25, "peak_mb": 1.0}
+# measure -> True if larger is better
+COMPARED_MEASURES = {"seconds": False, "peak_mb": False}
+
+# ---------------------------------------------------------------------------
+# HELPERS --------------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+
+class StageTimer:
+    """Wall time and traced peak memory of named pipeline stages."""
+
+    def __init__(self, trace_memory: bool = True) -> None:
+        self.trace_memory = trace_memory
+        self.results: dict[str, dict] = {}
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        # statisticalanalysis reports its progress with print()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            yield
+            seconds = time.perf_counter() - start
+        result = self.results.setdefault(name, {"seconds": seconds, "peak_mb": 0.0})
+        result["seconds"] = min(result["seconds"], seconds)
+        if self.trace_memory:
+            peak = (tracemalloc.get_traced_memory()[1] - base) / 1024**2
+            result["peak_mb"] = max(result["peak_mb"], peak)
+
+
+def run_pipeline(root: Path, iterations: int, workers: int, timer: StageTimer) -> None:
+    """Run statisticalanalysis.main() on *root* stage by stage under *timer*."""
+    gt_file = root / sa.GT_FILE.name
+    for cached in root.glob(".predictions_cache.*"):
+        cached.unlink()
+
+    with timer.stage("load"):
+        gt = sa.load_ground_truth(gt_file)
+        pred = sa.merge_ground_truth(sa.load_predictions(sorted(root.glob("run*"))), gt)
+    with contextlib.redirect_stdout(io.StringIO()):
+        sa.load_cached_predictions(root, gt, gt_file)  # warm the cache
+    with timer.stage("load_cached"):
+        pred = sa.load_cached_predictions(root, gt, gt_file)
+
+    with timer.stage("encode"):
+        indicators, averaging, groups, cells = sa.encode_predictions(pred, sa.group_cols)
+    with timer.stage("point"):
+        point_est = sa.point_estimates(indicators, averaging, cells)
+        comparisons = sa.select_comparisons(point_est, cells)
+        pairs = sa.prompt_pairs(cells)
+    with timer.stage("bootstrap"):
+        bw_signs = sa.best_worst_counters(comparisons)
+        pair_signs = {m: sa.SignCounter(pairs["a"], pairs["b"]) for m in sa.metric_funcs}
+        ci_frames = sa.bootstrap_cis(
+            indicators,
+            averaging,
+            cells,
+            {m: [*bw_signs[m], pair_signs[m]] for m in sa.metric_funcs},
+            iterations,
+            workers,
+        )
+    with timer.stage("pvalues"):
+        pvals = sa.best_worst_pvalues(comparisons, bw_signs)
+        sa.pairwise_pvalues(pairs, point_est, pair_signs)
+        sa.assemble_result(point_est, ci_frames, pvals)
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Return a message for every stage of every grid point that regressed."""
+    missing = set(results) - set(baseline) - {"settings"}
+    if missing:
+        logging.warning("Not in the baseline: %s", ", ".join(sorted(missing)))
+    regressions = []
+    for label, stages in results.items():
+        if label == "settings":
+            continue
+        for stage, measures in stages.items():
+            regressions += benchmarkbaseline.compare(
+                measures,
+                baseline.get(label, {}).get(stage, {}),
+                tolerance,
+                COMPARED_MEASURES,
+                MIN_DELTA,
+                name=f"{label} {stage} ",
+            )
+    return regressions
+
+
+# ---------------------------------------------------------------------------
+# ENTRY POINT ----------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Time every stage of statisticalanalysis.py on synthetic data."
+    )
+    parser.add_argument("--patients", type=int, nargs="+", default=[300])
+    parser.add_argument("--domains", type=int, nargs="+", default=[3])
+    parser.add_argument("--prompts", type=int, nargs="+", default=[4])
+    parser.add_argument("--runs", type=int, nargs="+", default=[3])
+    parser.add_argument("--iterations", type=int, nargs="+", default=[sa.BOOT_ITERATIONS])
+    parser.add_argument("--prevalence", type=float, default=0.2)
+    parser.add_argument("--accuracy", type=float, nargs=2, default=[0.6, 0.95])
+    parser.add_argument("--reasoning-chars", type=int, default=80)
+    parser.add_argument("--workers", type=int, default=1, help="Bootstrap processes.")
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Runs per grid point; the fastest counts."
+    )
+    parser.add_argument("--no-memory", action="store_true", help="Do not trace memory.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic data.")
+    parser.add_argument("--results", type=Path, help="Write the results as JSON to this file.")
+    benchmarkbaseline.add_arguments(parser, tolerance=0.25)
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="Logging verbosity",
+    )
+    args = parser.parse_args()
+    benchmarkbaseline.check_arguments(parser, args)
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level, format="%(levelname)s: %(message)s")
+    if not args.no_memory:
+        tracemalloc.start()
+
+    results: dict[str, dict] = {}
+    grid = itertools.product(
+        args.patients, args.domains, args.prompts, args.runs, args.iterations
+    )
+    for patients, domains, prompts, runs, iterations in grid:
+        label = f"n{patients}_d{domains}_k{prompts}_r{runs}_B{iterations}"
+        timer = StageTimer(trace_memory=not args.no_memory)
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            logging.getLogger().setLevel(logging.WARNING)
+            gen.generate(
+                root,
+                patients=patients,
+                domains=domains,
+                prompts=prompts,
+                runs=runs,
+                prevalence=args.prevalence,
+                accuracy=tuple(args.accuracy),
+                reasoning_chars=args.reasoning_chars,
+                seed=args.seed,
+            )
+            logging.getLogger().setLevel(args.log_level)
+            for _ in range(args.repeat):
+                run_pipeline(root, iterations, args.workers, timer)
+        results[label] = timer.results
+        logging.info(
+            "%-28s %s",
+            label,
+            "  ".join(
+                f"{stage} {timer.results[stage]['seconds']:.3f}s/"
+                f"{timer.results[stage]['peak_mb']:.0f}MB"
+                for stage in STAGES
+            ),
+        )
+
+    results["settings"] = {
+        key: getattr(args, key)
+        for key in (
+            "prevalence", "accuracy", "reasoning_chars", "workers", "repeat", "no_memory",
+            "seed",
+        )
+    }
+    if args.results:
+        args.results.write_text(json.dumps(results, indent=2))
+
+    benchmarkbaseline.save_or_compare(
+        args, results, lambda baseline: compare(results, baseline, args.tolerance)
+    )
+
+
+if __name__ == "__main__":  # required for --workers on Windows (spawn)
+    main()
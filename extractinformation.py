@@ -11,7 +11,9 @@ Usage
 -----
 $ python run_depression_analysis.py \
     --input clean_060624_LLM_Anamnese.xlsx \
-    --output reasoning_4096tokens_depression.csv
+    --output reasoning_4096tokens_depression.csv \
+    --concurrency 4 [--resume] [--no-cache | --refresh] [--stream] \
+    [--endpoints http://node1:8080/v1 http://node2:8080/v1]
 
 Minimal requirements are listed in *requirements.txt*.
 
@@ -22,13 +24,31 @@ variables or a local *.env* file – **never hard‑code credentials.**
 from __future__ import annotations
 
 import argparse
+import asyncio
+import csv
+import hashlib
+import itertools
 import json
 import logging
 import os
+import random
+import re
+import sqlite3
 import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Sequence,
+)
 
+import aiohttp
 import openai
 import pandas as pd
 from dotenv import load_dotenv
@@ -70,6 +90,770 @@ SCHEMA_WITH_REASONING = {
     },
 }
 
+# Generation budget requested for every completion
+MAX_TOKENS = 4096
+
+# Budget of an answer-only request: the JSON braces plus one boolean member
+# per condition ("depression": false) with some slack for whitespace
+ANSWER_ONLY_BASE_TOKENS = 16
+ANSWER_ONLY_TOKENS_PER_CONDITION = 16
+
+# Reasoning length granted per condition when several are asked at once
+MULTI_REASONING_PER_CONDITION = 512
+
+# Rough characters-per-token ratio used to estimate request sizes up front
+CHARS_PER_TOKEN = 4
+
+# Tokens of the chat template wrapped around the prompt, and the smallest
+# report part worth sending when a report has to be split
+PROMPT_OVERHEAD_TOKENS = 32
+MIN_PART_TOKENS = 128
+
+# With longest-first scheduling the reports are reordered within windows of
+# this many reports, so that the input can still be streamed
+SCHEDULE_WINDOW = 512
+
+# Default retry budget and per-request timeout (seconds) of the scheduler
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_REQUEST_TIMEOUT = 600
+
+# Failures in a row after which an endpoint is taken out of rotation, the
+# interval (seconds) at which removed endpoints are probed again, and the
+# number of intervals with every endpoint down after which requests fail
+ENDPOINT_FAILURE_THRESHOLD = 3
+ENDPOINT_HEALTH_INTERVAL = 10.0
+ENDPOINT_DOWN_INTERVALS = 3
+
+# Default location and size limit of the on-disk response cache
+DEFAULT_CACHE_PATH = Path(".clickbrick_cache.sqlite")
+DEFAULT_CACHE_SIZE_MB = 1024
+
+# ---------------------------------------------------------------------------
+# RESPONSE CACHE -------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+
+class ResponseCache:
+    """Persistent, content‑addressed store of raw model answers.
+
+    Entries are keyed by a SHA‑256 hash over everything that determines the
+    completion (model, messages, schema, temperature and token budget), so an
+    unchanged configuration never reaches the LLM twice.  This is only sound
+    for deterministic decoding – use ``--no-cache`` for sampling runs.
+
+    The SQLite file is bounded by *max_bytes*; when it grows beyond that the
+    least recently used answers are evicted.  With *refresh* every lookup
+    misses but fresh answers are still stored, overwriting stale ones.
+    """
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_CACHE_PATH,
+        max_bytes: int = DEFAULT_CACHE_SIZE_MB * 1024**2,
+        *,
+        refresh: bool = False,
+    ) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " content TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)"
+        )
+        self._conn.commit()
+        (total,) = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        self._total_bytes = total
+
+    @staticmethod
+    def key(
+        model: str,
+        messages: list[dict],
+        schema: dict,
+        temperature: float,
+        max_tokens: int,
+        seed: int | None = None,
+    ) -> str:
+        """Return the hex digest identifying one completion request.
+
+        A sampling *seed* is part of the key, so repeated runs that differ
+        only in their seed are cached separately.
+        """
+        request = {
+            "model": model,
+            "messages": messages,
+            "schema": schema,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        if seed is not None:
+            request["seed"] = seed
+        payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        """Return the cached answer for *key* (``None`` on a miss)."""
+        row = None
+        if not self.refresh:
+            row = self._conn.execute(
+                "SELECT content FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._conn.execute(
+            "UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key)
+        )
+        self._conn.commit()
+        return row[0]
+
+    def put(self, key: str, content: str) -> None:
+        """Store *content* under *key* and evict old entries beyond the limit."""
+        size = len(content.encode("utf-8"))
+        previous = self._conn.execute(
+            "SELECT size FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses (key, content, size, last_used)"
+            " VALUES (?, ?, ?, ?)",
+            (key, content, size, time.time()),
+        )
+        self._total_bytes += size - (previous[0] if previous else 0)
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+        self._conn.commit()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the size limit holds again."""
+        victims = []
+        freed = 0
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_used"
+        ):
+            if self._total_bytes - freed <= self.max_bytes:
+                break
+            victims.append((key,))
+            freed += size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self._total_bytes -= freed
+        logging.debug("Evicted %d cached responses (%d bytes)", len(victims), freed)
+
+    def close(self) -> None:
+        """Flush and close the underlying database."""
+        self._conn.commit()
+        self._conn.close()
+
+
+# ---------------------------------------------------------------------------
+# REQUEST SCHEDULING ---------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+# Errors that signal a transient problem of an overloaded or restarting server
+RETRYABLE_ERRORS = (
+    openai.error.APIConnectionError,
+    openai.error.RateLimitError,
+    openai.error.ServiceUnavailableError,
+    openai.error.Timeout,
+    openai.error.TryAgain,
+    aiohttp.ClientError,
+    asyncio.TimeoutError,
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap upper-bound-ish token estimate of *text* without a tokenizer."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Return whether *exc* is worth another attempt."""
+    if isinstance(exc, RETRYABLE_ERRORS):
+        return True
+    status = getattr(exc, "http_status", None)
+    return isinstance(exc, openai.error.APIError) and (status is None or status >= 500)
+
+
+class RequestScheduler:
+    """Admission control, retries and pacing for concurrent LLM requests.
+
+    * **AIMD concurrency** – at most ``limit`` requests are in flight.  Every
+      successful request raises the limit by ``1 / limit`` (about one slot
+      per round trip) up to *max_concurrency*; a transient error or a latency
+      spike (short-term mean above *latency_tolerance* times the long-term
+      mean) halves it, at most once per round trip, down to
+      *min_concurrency*.
+    * **Retries** – transient failures (see :func:`is_retryable`) are retried
+      up to *max_retries* times with exponential backoff and full jitter.
+    * **Token budget** – with *tokens_per_minute* a token bucket holds back
+      requests once the budget is spent.  Requests are charged their
+      estimated prompt size up front and corrected with ``response.usage``.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        *,
+        min_concurrency: int = 1,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_base: float = 1.0,
+        backoff_cap: float = 60.0,
+        tokens_per_minute: int | None = None,
+        latency_tolerance: float = 2.0,
+    ) -> None:
+        if max_concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min(min_concurrency, max_concurrency)
+        self.limit = float(max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.tokens_per_minute = tokens_per_minute
+        self.latency_tolerance = latency_tolerance
+        self.retries = 0
+
+        self._in_flight = 0
+        self._condition = asyncio.Condition()
+        self._budget = float(tokens_per_minute or 0)
+        self._refilled = time.monotonic()
+        self._fast_latency: float | None = None
+        self._slow_latency: float | None = None
+        self._last_decrease = 0.0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self.tokens_per_minute:
+            self._budget = min(
+                float(self.tokens_per_minute),
+                self._budget + (now - self._refilled) * self.tokens_per_minute / 60,
+            )
+        self._refilled = now
+
+    def _budget_wait(self, tokens: int) -> float:
+        """Seconds until *tokens* fit into the bucket (0 when they do now)."""
+        if not self.tokens_per_minute:
+            return 0.0
+        # A request larger than the whole bucket only has to wait for a full one.
+        needed = min(tokens, self.tokens_per_minute) - self._budget
+        return max(needed, 0.0) * 60 / self.tokens_per_minute
+
+    async def _acquire(self, tokens: int) -> None:
+        async with self._condition:
+            while True:
+                self._refill()
+                if self._in_flight < int(self.limit):
+                    wait = self._budget_wait(tokens)
+                    if wait == 0:
+                        break
+                    try:
+                        await asyncio.wait_for(self._condition.wait(), timeout=wait)
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    await self._condition.wait()
+            self._in_flight += 1
+            if self.tokens_per_minute:
+                self._budget -= tokens
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        # React once per round trip; the requests already in flight saw the
+        # same congestion and must not shrink the window again.
+        if now - self._last_decrease < (self._fast_latency or 0.0):
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.min_concurrency), self.limit / 2)
+        logging.debug("Congestion – concurrency limit lowered to %d", int(self.limit))
+
+    async def _release(
+        self, *, latency: float | None, failed: bool, correction: int = 0
+    ) -> None:
+        async with self._condition:
+            self._in_flight -= 1
+            if self.tokens_per_minute:
+                self._budget -= correction
+
+            if failed:
+                self._decrease()
+            elif latency is not None:
+                if self._slow_latency is None:
+                    self._fast_latency = self._slow_latency = latency
+                self._fast_latency = 0.7 * self._fast_latency + 0.3 * latency
+                self._slow_latency = 0.98 * self._slow_latency + 0.02 * latency
+                if self._fast_latency > self.latency_tolerance * self._slow_latency:
+                    self._decrease()
+                else:
+                    self.limit = min(
+                        float(self.max_concurrency), self.limit + 1 / self.limit
+                    )
+            self._condition.notify_all()
+
+    async def submit(
+        self,
+        call: Callable[[], Awaitable],
+        tokens: int = 0,
+        trace: "RequestTrace | None" = None,
+    ):
+        """Await ``call()`` under admission control and return its response.
+
+        *tokens* is the estimated size of the request.  The last exception is
+        re-raised once the retry budget is exhausted or the error is not
+        transient.  Admission time and retries are noted on *trace*.
+        """
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(tokens)
+            start = time.perf_counter()
+            if trace is not None:
+                trace.admitted = trace.admitted or start
+                trace.sent = start
+                trace.first_byte = None
+                trace.retries = attempt
+            try:
+                response = await call()
+            except Exception as exc:  # pylint: disable=broad-except
+                transient = is_retryable(exc)
+                await self._release(latency=None, failed=transient)
+                if not transient or attempt == self.max_retries:
+                    raise
+                delay = random.uniform(
+                    0, min(self.backoff_cap, self.backoff_base * 2**attempt)
+                )
+                logging.warning(
+                    "Transient error (%s) – retry %d/%d in %.1fs",
+                    exc,
+                    attempt + 1,
+                    self.max_retries,
+                    delay,
+                )
+                self.retries += 1
+                await asyncio.sleep(delay)
+                continue
+
+            usage = response.get("usage") or {}
+            used = usage.get("total_tokens")
+            await self._release(
+                latency=time.perf_counter() - start,
+                failed=False,
+                correction=(used - tokens) if used is not None else 0,
+            )
+            return response
+        raise AssertionError("unreachable")  # pragma: no cover
+
+
+class Endpoint:
+    """Book-keeping for one OpenAI-compatible server of an :class:`EndpointPool`."""
+
+    def __init__(self, api_base: str) -> None:
+        self.api_base = api_base.rstrip("/")
+        self.outstanding = 0
+        self.failures = 0
+        self.healthy = True
+        self.requests = 0
+
+    @property
+    def health_url(self) -> str:
+        """llama.cpp serves ``/health`` next to (not below) the ``/v1`` API."""
+        root = self.api_base[: -len("/v1")] if self.api_base.endswith("/v1") else self.api_base
+        return f"{root}/health"
+
+
+class EndpointPool:
+    """Spread requests over several llama.cpp servers.
+
+    Each request goes to the healthy endpoint with the fewest outstanding
+    requests, so faster servers naturally receive more work.  After
+    *failure_threshold* transient failures in a row an endpoint is taken out
+    of rotation; :meth:`monitor` probes removed endpoints every
+    *health_interval* seconds and puts them back once ``/health`` answers.
+    While no endpoint is healthy, requests wait; once all endpoints have been
+    down for *down_intervals* health intervals, waiting and new requests fail
+    with a ``RuntimeError`` instead of hanging the batch.
+    """
+
+    def __init__(
+        self,
+        api_bases: Sequence[str],
+        *,
+        failure_threshold: int = ENDPOINT_FAILURE_THRESHOLD,
+        health_interval: float = ENDPOINT_HEALTH_INTERVAL,
+        down_intervals: int = ENDPOINT_DOWN_INTERVALS,
+    ) -> None:
+        if not api_bases:
+            raise ValueError("at least one endpoint is required")
+        self.endpoints = [Endpoint(base) for base in api_bases]
+        self.failure_threshold = failure_threshold
+        self.health_interval = health_interval
+        self.down_intervals = down_intervals
+        self._down_since: float | None = None
+        self._condition = asyncio.Condition()
+
+    def down_for(self) -> float:
+        """Seconds since the last healthy endpoint was removed (0 if any is up)."""
+        return 0.0 if self._down_since is None else time.monotonic() - self._down_since
+
+    async def acquire(self) -> Endpoint:
+        """Reserve the least loaded healthy endpoint."""
+        async with self._condition:
+            while True:
+                healthy = [e for e in self.endpoints if e.healthy]
+                if healthy:
+                    break
+                if self.down_for() >= self.down_intervals * self.health_interval:
+                    raise RuntimeError(
+                        f"all {len(self.endpoints)} endpoints down for "
+                        f"{self.down_for():.0f}s: "
+                        + ", ".join(e.api_base for e in self.endpoints)
+                    )
+                try:
+                    await asyncio.wait_for(self._condition.wait(), self.health_interval)
+                except asyncio.TimeoutError:
+                    pass
+            endpoint = min(healthy, key=lambda e: e.outstanding)
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    async def release(self, endpoint: Endpoint, *, failed: bool) -> None:
+        """Return *endpoint* after a request and update its health."""
+        async with self._condition:
+            endpoint.outstanding -= 1
+            if not failed:
+                endpoint.failures = 0
+            else:
+                endpoint.failures += 1
+                if endpoint.healthy and endpoint.failures >= self.failure_threshold:
+                    endpoint.healthy = False
+                    logging.warning(
+                        "Endpoint %s removed after %d failures",
+                        endpoint.api_base,
+                        endpoint.failures,
+                    )
+                    if self._down_since is None and not any(e.healthy for e in self.endpoints):
+                        self._down_since = time.monotonic()
+            self._condition.notify_all()
+
+    @staticmethod
+    async def probe(endpoint: Endpoint, session: aiohttp.ClientSession) -> bool:
+        """Return whether *endpoint* is reachable and ready to serve.
+
+        llama.cpp answers ``/health`` with 503 while the model is loading;
+        servers without that route (404) count as ready once they respond.
+        """
+        try:
+            async with session.get(
+                endpoint.health_url, timeout=aiohttp.ClientTimeout(total=5)
+            ) as response:
+                return response.status < 500
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return False
+
+    async def monitor(self, session: aiohttp.ClientSession) -> None:
+        """Probe removed endpoints forever and re-add recovered ones.
+
+        While every endpoint is down an error is logged each interval.
+        """
+        while True:
+            await asyncio.sleep(self.health_interval)
+            for endpoint in self.endpoints:
+                if endpoint.healthy or not await self.probe(endpoint, session):
+                    continue
+                async with self._condition:
+                    endpoint.healthy = True
+                    endpoint.failures = 0
+                    self._down_since = None
+                    self._condition.notify_all()
+                logging.info("Endpoint %s is healthy again", endpoint.api_base)
+            if self._down_since is not None:
+                logging.error(
+                    "No endpoint reachable for %.0fs (requests fail after %.0fs): %s",
+                    self.down_for(),
+                    self.down_intervals * self.health_interval,
+                    ", ".join(e.api_base for e in self.endpoints),
+                )
+
+
+# ---------------------------------------------------------------------------
+# TELEMETRY ------------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class RequestTrace:
+    """Timings and accounting of one request, filled in as it progresses.
+
+    All timestamps are :func:`time.perf_counter` values.  ``admitted`` marks
+    the first attempt and ``sent`` the last one, so the latency includes
+    retries while the time to first byte does not.  ``first_byte`` is only
+    known for streamed requests.
+    """
+
+    report_id: str
+    conditions: tuple[str, ...]
+    enqueued: float
+    admitted: float | None = None
+    sent: float | None = None
+    first_byte: float | None = None
+    finished: float | None = None
+    retries: int = 0
+    endpoint: str | None = None
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+    cache_hit: bool = False
+    parse_failed: bool = False
+    early_stopped: bool = False
+    error: str | None = None
+
+    def record(self) -> dict:
+        """Return the JSON-serialisable telemetry row of this request."""
+
+        def since(start: float | None, end: float | None) -> float | None:
+            if start is None or end is None:
+                return None
+            return round(end - start, 4)
+
+        return {
+            "id": self.report_id,
+            "conditions": list(self.conditions),
+            "queue_wait_s": since(self.enqueued, self.admitted),
+            "ttfb_s": since(self.sent, self.first_byte),
+            "latency_s": since(self.admitted, self.finished),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "retries": self.retries,
+            "endpoint": self.endpoint,
+            "cache_hit": self.cache_hit,
+            "parse_failed": self.parse_failed,
+            "early_stopped": self.early_stopped,
+            "error": self.error,
+        }
+
+
+class TelemetryLog:
+    """JSONL sidecar receiving one :class:`RequestTrace` record per request."""
+
+    def __init__(self, path: Path, *, append: bool = False) -> None:
+        self.path = path
+        self.records: List[dict] = []
+        self.started = time.perf_counter()
+        self._handle = path.open("a" if append else "w", encoding="utf-8")
+
+    @staticmethod
+    def path_for(output_path: Path) -> Path:
+        """Return the sidecar location belonging to *output_path*."""
+        return output_path.with_name(output_path.stem + ".telemetry.jsonl")
+
+    def write(self, trace: RequestTrace) -> None:
+        record = trace.record()
+        self.records.append(record)
+        self._handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._handle.flush()
+
+    def summary(self) -> dict:
+        """Aggregate latency percentiles and throughput of this run."""
+        elapsed = time.perf_counter() - self.started
+        sent = [r for r in self.records if not r["cache_hit"]]
+        latency = pd.Series(
+            [r["latency_s"] for r in sent if r["latency_s"] is not None], dtype=float
+        )
+        ttfb = pd.Series(
+            [r["ttfb_s"] for r in sent if r["ttfb_s"] is not None], dtype=float
+        )
+        prompt_tokens = sum(r["prompt_tokens"] or 0 for r in sent)
+        completion_tokens = sum(r["completion_tokens"] or 0 for r in sent)
+        summary = {
+            "requests": len(self.records),
+            "cache_hits": len(self.records) - len(sent),
+            "errors": sum(r["error"] is not None for r in self.records),
+            "parse_failures": sum(r["parse_failed"] for r in self.records),
+            "retries": sum(r["retries"] for r in self.records),
+            "elapsed_s": elapsed,
+            "requests_per_s": len(self.records) / elapsed if elapsed else 0.0,
+            "prompt_tokens_per_s": prompt_tokens / elapsed if elapsed else 0.0,
+            "completion_tokens_per_s": completion_tokens / elapsed if elapsed else 0.0,
+        }
+        for q in (50, 95, 99):
+            summary[f"latency_p{q}_s"] = latency.quantile(q / 100) if len(latency) else None
+            summary[f"ttfb_p{q}_s"] = ttfb.quantile(q / 100) if len(ttfb) else None
+        return summary
+
+    def close(self) -> None:
+        self._handle.close()
+
+    def __enter__(self) -> "TelemetryLog":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def log_summary(summary: dict) -> None:
+    """Print the run summary produced by :meth:`TelemetryLog.summary`."""
+
+    def fmt(value: float | None) -> str:
+        return "n/a" if value is None else f"{value:.2f}s"
+
+    logging.info(
+        "Run summary: %d requests (%d cached, %d errors, %d parse failures, "
+        "%d retries) in %.1fs",
+        summary["requests"],
+        summary["cache_hits"],
+        summary["errors"],
+        summary["parse_failures"],
+        summary["retries"],
+        summary["elapsed_s"],
+    )
+    logging.info(
+        "Latency p50/p95/p99: %s / %s / %s; time to first byte p50/p95/p99: %s / %s / %s",
+        *(fmt(summary[f"latency_p{q}_s"]) for q in (50, 95, 99)),
+        *(fmt(summary[f"ttfb_p{q}_s"]) for q in (50, 95, 99)),
+    )
+    logging.info(
+        "Throughput: %.2f requests/s, %.1f prompt tokens/s, %.1f completion tokens/s",
+        summary["requests_per_s"],
+        summary["prompt_tokens_per_s"],
+        summary["completion_tokens_per_s"],
+    )
+
+
+def latency_saved(records: Sequence[dict], reference_path: Path) -> dict:
+    """Compare the mean latency of *records* with a reference telemetry file.
+
+    *reference_path* is the sidecar of an earlier run in full reasoning mode
+    over comparable reports.  Cache hits and failed requests are left out on
+    both sides.
+    """
+
+    def mean_latency(rows: Iterable[dict]) -> float | None:
+        values = [
+            r["latency_s"]
+            for r in rows
+            if not r["cache_hit"] and r["error"] is None and r["latency_s"] is not None
+        ]
+        return sum(values) / len(values) if values else None
+
+    with reference_path.open(encoding="utf-8") as handle:
+        reference = mean_latency(json.loads(line) for line in handle if line.strip())
+    current = mean_latency(records)
+    saved = None if reference is None or current is None else reference - current
+    return {"reference_s": reference, "current_s": current, "saved_s": saved}
+
+
+def log_latency_saved(comparison: dict, reference_path: Path) -> None:
+    """Print the result of :func:`latency_saved`."""
+    if comparison["saved_s"] is None:
+        logging.info("No latencies to compare with %s", reference_path)
+        return
+    logging.info(
+        "Mean latency %.2fs per request vs %.2fs in %s: %.2fs (%.0f%%) saved",
+        comparison["current_s"],
+        comparison["reference_s"],
+        reference_path,
+        comparison["saved_s"],
+        100 * comparison["saved_s"] / comparison["reference_s"],
+    )
+
+
+# ---------------------------------------------------------------------------
+# INPUT READING --------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+
+def iter_rows(path: Path, columns: Sequence[str] | None = None) -> Iterator[dict]:
+    """Yield the rows of an XLSX, CSV or Parquet table one at a time.
+
+    Nothing but the current row (or Parquet record batch) is held in memory,
+    so the first report is available immediately whatever the size of the
+    file.  *columns* restricts the returned keys; a requested column missing
+    from the header raises a ValueError before the first row is yielded.
+    """
+
+    def check_header(header: Sequence[str]) -> None:
+        missing = [c for c in columns or () if c not in header]
+        if missing:
+            raise ValueError(
+                f"{path}: missing column(s) {', '.join(map(repr, missing))}; "
+                f"found {', '.join(map(repr, header))}"
+            )
+
+    suffix = path.suffix.lower()
+    if suffix in (".xlsx", ".xlsm"):
+        import openpyxl
+
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(name) for name in next(rows, ())]
+            check_header(header)
+            for values in rows:
+                if any(value is not None for value in values):
+                    row = dict(zip(header, values))
+                    yield {c: row.get(c) for c in columns} if columns else row
+        finally:
+            workbook.close()
+    elif suffix == ".csv":
+        # utf-8-sig: Excel starts its CSVs with a BOM that would stick to "id"
+        with path.open(newline="", encoding="utf-8-sig") as handle:
+            reader = csv.DictReader(handle)
+            check_header(reader.fieldnames or [])
+            for row in reader:
+                yield {c: row.get(c) for c in columns} if columns else row
+    elif suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(path)
+        check_header(parquet.schema_arrow.names)
+        for batch in parquet.iter_batches(
+            batch_size=256, columns=list(columns) if columns else None
+        ):
+            yield from batch.to_pylist()
+    else:
+        raise ValueError(f"Unsupported input format: {path.suffix}")
+
+
+def iter_reports(
+    path: Path, id_column: str = "id", text_column: str = "report"
+) -> Iterator[tuple[str, str]]:
+    """Yield ``(id, report_text)`` pairs of *path* row by row."""
+    for row in iter_rows(path, [id_column, text_column]):
+        yield str(row[id_column]), str(row[text_column])
+
+
+def check_unique_ids(path: Path, id_column: str = "id", text_column: str = "report") -> None:
+    """Raise ``ValueError`` listing the ids that occur more than once in *path*.
+
+    Answers are matched to reports by id, so a repeated id would receive the
+    answer of another report.  The header is checked as in :func:`iter_rows`.
+    """
+    seen: set[str] = set()
+    duplicates: Dict[str, None] = {}
+    for row in iter_rows(path, [id_column, text_column]):
+        row_id = str(row[id_column])
+        if row_id in seen:
+            duplicates[row_id] = None
+        seen.add(row_id)
+    if duplicates:
+        shown = ", ".join(map(repr, itertools.islice(duplicates, 10)))
+        raise ValueError(
+            f"{path}: {len(duplicates)} duplicate {id_column} value(s): {shown}"
+            + (", …" if len(duplicates) > 10 else "")
+        )
+
+
 # ---------------------------------------------------------------------------
 # HELPER FUNCTIONS -----------------------------------------------------------
 # ---------------------------------------------------------------------------
@@ -90,24 +874,252 @@ def configure_openai(api_base: str | None = None, api_key: str | None = None) ->
         )
 
 
-def analyse_report(
+def flag_key(condition: str) -> str:
+    """Return the JSON property (and CSV column) holding *condition*'s flag."""
+    return condition.lower()
+
+
+def build_schema(
+    conditions: Sequence[str],
+    reasoning_max_length: int = 2048,
+    *,
+    reasoning: bool = True,
+    flags_first: bool = False,
+) -> dict:
+    """Build a strict JSON schema with a reasoning field and one boolean per
+    entry of *conditions*.
+
+    ``build_schema(["Depression"])`` reproduces :data:`SCHEMA_WITH_REASONING`.
+    Without *reasoning* the answer holds the booleans only.  *flags_first*
+    places the booleans ahead of the reasoning; grammar-constrained servers
+    generate the members in schema order, so the flags then arrive first.
+    """
+    flags = {flag_key(c): {"type": "boolean"} for c in conditions}
+    explanation = (
+        {"reasoning": {"type": "string", "maxLength": reasoning_max_length}}
+        if reasoning
+        else {}
+    )
+    properties: dict = {**flags, **explanation} if flags_first else {**explanation, **flags}
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": properties,
+                "required": list(properties),
+            },
+        },
+    }
+
+
+def build_question(conditions: Sequence[str]) -> str:
+    """Phrase the question asked about *conditions* in a single request."""
+    if list(conditions) == ["Depression"]:
+        return (
+            "Zeigt der Patient Symptome einer Depression? "
+            "Beantworte die Frage Schritt für Schritt und gib eine abschließende Schlussfolgerung! "
+        )
+    if len(conditions) == 1:
+        return (
+            f"Zeigt der Patient Symptome aus dem Bereich {conditions[0]}? "
+            "Beantworte die Frage Schritt für Schritt und gib eine abschließende Schlussfolgerung! "
+        )
+    return (
+        f"Zeigt der Patient Symptome aus den Bereichen {', '.join(conditions)}? "
+        "Beantworte die Frage für jeden Bereich Schritt für Schritt und gib "
+        "jeweils eine abschließende Schlussfolgerung! "
+    )
+
+
+def build_messages(
     report_text: str,
+    conditions: Sequence[str] = ("Depression",),
+    report_first: bool = False,
+    question: str | None = None,
+) -> list[dict]:
+    """Assemble the chat messages sent for a single *report_text*.
+
+    By default the question precedes the report, as in the published runs.
+    With *report_first* the report opens the prompt and the question follows
+    it, so every question about the same report shares one token prefix that
+    llama.cpp can serve from its KV cache instead of processing it again.
+    *question* replaces the built-in wording of :func:`build_question`, e.g.
+    with a prompt from the prompt table.
+    """
+    if question is None:
+        question = build_question(conditions)
+    if report_first:
+        prompt = f"{report_text}\n\n{question.rstrip()}"
+    else:
+        prompt = question + report_text
+    return [{"role": "user", "content": prompt}]
+
+
+def request_options(report_first: bool) -> dict:
+    """Extra llama.cpp request fields for the chosen prompt layout."""
+    # Ask the server to keep the processed prompt in the slot's KV cache so
+    # the next request with the same report prefix can reuse it.
+    return {"cache_prompt": True} if report_first else {}
+
+
+class Job(NamedTuple):
+    """One request of a batch: a report and the conditions asked about.
+
+    *question* overrides the built-in question and *seed* is passed to the
+    server as sampling seed (see :func:`extract_async`).
+    """
+
+    report_text: str
+    conditions: tuple[str, ...]
+    report_id: str = ""
+    question: str | None = None
+    seed: int | None = None
+
+
+class Extraction(NamedTuple):
+    """Parsed answer of one request plus the token usage it cost.
+
+    ``flags`` maps every requested condition to its boolean (``None`` when
+    missing).  Token counts are ``None`` for failed requests and cache hits.
+    """
+
+    reasoning: str | None
+    flags: Dict[str, bool | None]
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+
+
+def parse_content(
+    content: str, conditions: Sequence[str] = ("Depression",)
+) -> tuple[str | None, Dict[str, bool | None]]:
+    """Extract the reasoning and the per-condition flags from the JSON answer."""
+    try:
+        data = json.loads(content)
+        return data.get("reasoning"), {c: data.get(flag_key(c)) for c in conditions}
+    except (AttributeError, json.JSONDecodeError) as exc:  # pragma: no cover
+        logging.error("Failed to parse model output: %s", exc, exc_info=True)
+        return None, {c: None for c in conditions}
+
+
+class FlagScanner:
+    """Incremental scanner for the boolean members of a streamed JSON answer.
+
+    Characters are fed as they arrive; :meth:`feed` returns ``True`` once a
+    value has been seen for every key in *keys*.  Only top-level members
+    count, and keys or literals quoted inside string values are ignored.
+    """
+
+    def __init__(self, keys: Iterable[str]) -> None:
+        self.keys = set(keys)
+        self.flags: Dict[str, bool] = {}
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._chars: List[str] = []
+        self._key: str | None = None
+        self._expect = "key"  # key -> colon -> value -> comma -> key …
+        self._literal = ""
+
+    @property
+    def complete(self) -> bool:
+        return self.keys <= self.flags.keys()
+
+    def feed(self, text: str) -> bool:
+        for char in text:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._end_string()
+                else:
+                    self._chars.append(char)
+            elif char == '"':
+                self._in_string = True
+                self._chars = []
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1:
+                    self._expect = "comma"
+            elif self._depth != 1 or char.isspace():
+                continue
+            elif char == ":" and self._expect == "colon":
+                self._expect, self._literal = "value", ""
+            elif char == ",":
+                self._expect = "key"
+            elif self._expect == "value":
+                self._literal += char
+                if self._literal in ("true", "false"):
+                    if self._key in self.keys:
+                        self.flags[self._key] = self._literal == "true"
+                    self._expect = "comma"
+        return self.complete
+
+    def _end_string(self) -> None:
+        if self._depth != 1:
+            return
+        if self._expect == "key":
+            self._key, self._expect = "".join(self._chars), "colon"
+        elif self._expect == "value":
+            self._expect = "comma"
+
+
+def _lookup(
+    cache: ResponseCache | None, key: str | None, conditions: Sequence[str]
+) -> Extraction | None:
+    """Return the cached extraction for *key*, if any."""
+    if cache is None:
+        return None
+    content = cache.get(key)
+    if content is None:
+        return None
+    return Extraction(*parse_content(content, conditions))
+
+
+def _finish(
+    response,
+    conditions: Sequence[str],
+    cache: ResponseCache | None,
+    key: str | None,
+) -> Extraction:
+    """Parse *response*, cache it if complete and attach its token usage."""
+    content = response["choices"][0]["message"]["content"]
+    reasoning, flags = parse_content(content, conditions)
+    if cache is not None and None not in flags.values():
+        cache.put(key, content)
+
+    usage = response.get("usage") or {}
+    return Extraction(
+        reasoning, flags, usage.get("prompt_tokens"), usage.get("completion_tokens")
+    )
+
+
+def extract(
+    report_text: str,
+    conditions: Sequence[str],
     model: str,
     schema: dict,
     temperature: float = 0.0,
-) -> tuple[str | None, bool | None]:
-    """Call the LLM and return *(reasoning, depression_flag)*.
+    cache: ResponseCache | None = None,
+    report_first: bool = False,
+) -> Extraction:
+    """Ask about all *conditions* of *report_text* in one request.
 
-    Returns ``(None, None)`` on error so the caller can decide how to handle
-    failures (e.g., leave blanks in the CSV but keep processing the batch).
+    *report_first* selects the prompt layout of :func:`build_messages`.
+    Failures are logged and yield an :class:`Extraction` whose fields are all
+    ``None`` so that the batch keeps going.
     """
-    prompt = (
-        "Zeigt der Patient Symptome einer Depression? "
-        "Beantworte die Frage Schritt für Schritt und gib eine abschließende Schlussfolgerung! "
-        f"{report_text}"
-    )
-
-    messages = [{"role": "user", "content": prompt}]
+    messages = build_messages(report_text, conditions, report_first)
+    key = cache.key(model, messages, schema, temperature, MAX_TOKENS) if cache else None
+    cached = _lookup(cache, key, conditions)
+    if cached is not None:
+        return cached
 
     try:
         start = time.perf_counter()
@@ -116,20 +1128,562 @@ def analyse_report(
             messages=messages,
             response_format=schema,
             temperature=temperature,
-            max_tokens=4096,
+            max_tokens=MAX_TOKENS,
+            **request_options(report_first),
         )
         duration = time.perf_counter() - start
         logging.debug("Model call finished in %.2fs", duration)
+        return _finish(response, conditions, cache, key)
     except Exception as exc:  # pylint: disable=broad-except
         logging.error("OpenAI call failed: %s", exc, exc_info=True)
-        return None, None
+        return Extraction(None, {c: None for c in conditions})
+
+
+async def collect_stream(
+    chunks, trace: RequestTrace | None = None, scanner: FlagScanner | None = None
+) -> dict:
+    """Drain a streamed ChatCompletion into the shape of a regular response.
+
+    The arrival of the first chunk is noted on *trace* as time to first byte.
+    With a *scanner* the stream is closed as soon as every flag has been
+    received – dropping the connection makes the server stop generating –
+    and the answer is made up of the flags alone.
+    """
+    parts: List[str] = []
+    usage = None
+    async for chunk in chunks:
+        if trace is not None and trace.first_byte is None:
+            trace.first_byte = time.perf_counter()
+        if chunk.get("usage"):
+            usage = chunk["usage"]
+        if chunk.get("choices"):
+            parts.append(chunk["choices"][0].get("delta", {}).get("content") or "")
+            if scanner is not None and scanner.feed(parts[-1]):
+                await chunks.aclose()
+                if trace is not None:
+                    trace.early_stopped = True
+                content = json.dumps({"reasoning": None, **scanner.flags})
+                return {
+                    "choices": [{"message": {"role": "assistant", "content": content}}],
+                    "usage": None,
+                }
+    return {
+        "choices": [{"message": {"role": "assistant", "content": "".join(parts)}}],
+        "usage": usage,
+    }
+
+
+async def extract_async(
+    report_text: str,
+    conditions: Sequence[str],
+    model: str,
+    schema: dict,
+    temperature: float = 0.0,
+    cache: ResponseCache | None = None,
+    report_first: bool = False,
+    scheduler: RequestScheduler | None = None,
+    trace: RequestTrace | None = None,
+    stream: bool = False,
+    endpoints: EndpointPool | None = None,
+    question: str | None = None,
+    seed: int | None = None,
+    max_tokens: int = MAX_TOKENS,
+    early_stop: bool = False,
+) -> Extraction:
+    """Asynchronous twin of :func:`extract`.
+
+    With a *scheduler* the request is subject to its concurrency limit, token
+    budget and retry policy; only failures that survive all retries yield an
+    empty :class:`Extraction`.  *stream* receives the answer incrementally,
+    which makes the time to first byte observable.  Timings, token usage
+    and failures are recorded on *trace*.  With *endpoints* every attempt is
+    sent to the least loaded healthy server of the pool.  *question*
+    replaces the built-in question, and *seed* is sent as the server's
+    sampling seed so that repeated runs at a non-zero *temperature* are
+    reproducible.
+
+    *max_tokens* caps the completion (small for answer-only schemas).  With
+    *early_stop* the answer is streamed and the request closed as soon as
+    every condition's flag has been received (see :class:`FlagScanner`).
+    """
+    messages = build_messages(report_text, conditions, report_first, question)
+    key = cache.key(model, messages, schema, temperature, max_tokens, seed) if cache else None
+    cached = _lookup(cache, key, conditions)
+    if cached is not None:
+        if trace is not None:
+            trace.cache_hit = True
+        return cached
+    stream = stream or early_stop
+
+    async def send(api_base: str | None):
+        response = await openai.ChatCompletion.acreate(
+            model=model,
+            messages=messages,
+            response_format=schema,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            request_timeout=DEFAULT_REQUEST_TIMEOUT,
+            stream=stream,
+            api_base=api_base,
+            **({"stream_options": {"include_usage": True}} if stream else {}),
+            **({"seed": seed} if seed is not None else {}),
+            **request_options(report_first),
+        )
+        if stream:
+            scanner = FlagScanner(map(flag_key, conditions)) if early_stop else None
+            return await collect_stream(response, trace, scanner)
+        return response
+
+    async def call():
+        if endpoints is None:
+            return await send(None)
+        endpoint = await endpoints.acquire()
+        if trace is not None:
+            trace.endpoint = endpoint.api_base
+        try:
+            response = await send(endpoint.api_base)
+        except Exception as exc:
+            await endpoints.release(endpoint, failed=is_retryable(exc))
+            raise
+        await endpoints.release(endpoint, failed=False)
+        return response
 
     try:
-        data = json.loads(response.choices[0].message["content"])
-        return data.get("reasoning"), data.get("depression")
-    except (KeyError, json.JSONDecodeError) as exc:  # pragma: no cover
-        logging.error("Failed to parse model output: %s", exc, exc_info=True)
-        return None, None
+        start = time.perf_counter()
+        if scheduler is None:
+            if trace is not None:
+                trace.admitted = trace.sent = start
+            response = await call()
+        else:
+            tokens = estimate_tokens(messages[0]["content"])
+            response = await scheduler.submit(call, tokens, trace)
+        duration = time.perf_counter() - start
+        logging.debug("Model call finished in %.2fs", duration)
+        result = _finish(response, conditions, cache, key)
+    except Exception as exc:  # pylint: disable=broad-except
+        logging.error("OpenAI call failed: %s", exc, exc_info=True)
+        result = Extraction(None, {c: None for c in conditions})
+        if trace is not None:
+            trace.error = repr(exc)
+    else:
+        if trace is not None:
+            trace.parse_failed = None in result.flags.values()
+
+    if trace is not None:
+        trace.finished = time.perf_counter()
+        trace.prompt_tokens = result.prompt_tokens
+        trace.completion_tokens = result.completion_tokens
+    return result
+
+
+def analyse_report(
+    report_text: str,
+    model: str,
+    schema: dict,
+    temperature: float = 0.0,
+    cache: ResponseCache | None = None,
+) -> tuple[str | None, bool | None]:
+    """Call the LLM and return *(reasoning, depression_flag)*.
+
+    Returns ``(None, None)`` on error so the caller can decide how to handle
+    failures (e.g., leave blanks in the CSV but keep processing the batch).
+    Answers found in *cache* are returned without contacting the model.
+    """
+    result = extract(report_text, ["Depression"], model, schema, temperature, cache)
+    return result.reasoning, result.flags["Depression"]
+
+
+async def analyse_report_async(
+    report_text: str,
+    model: str,
+    schema: dict,
+    temperature: float = 0.0,
+    cache: ResponseCache | None = None,
+) -> tuple[str | None, bool | None]:
+    """Asynchronous twin of :func:`analyse_report` with the same contract."""
+    result = await extract_async(
+        report_text, ["Depression"], model, schema, temperature, cache
+    )
+    return result.reasoning, result.flags["Depression"]
+
+
+def condition_groups(
+    conditions: Sequence[str], multi_condition: bool = False
+) -> List[tuple[str, ...]]:
+    """Split *conditions* into the sets asked together in one request.
+
+    The per-condition mode asks one question per condition; the
+    *multi_condition* mode asks about all of them at once.
+    """
+    if multi_condition:
+        return [tuple(conditions)]
+    return [(condition,) for condition in conditions]
+
+
+def job_schema(
+    conditions: Sequence[str], answer_only: bool = False, early_stop: bool = False
+) -> dict:
+    """Return the schema for a request about *conditions*.
+
+    *answer_only* drops the reasoning; *early_stop* moves the flags ahead of
+    it so that the request can be closed once they have arrived.
+    """
+    if answer_only:
+        return build_schema(conditions, reasoning=False)
+    if len(conditions) == 1:
+        return build_schema(conditions, flags_first=early_stop)
+    return build_schema(
+        conditions,
+        reasoning_max_length=MULTI_REASONING_PER_CONDITION * len(conditions),
+        flags_first=early_stop,
+    )
+
+
+def job_max_tokens(conditions: Sequence[str], answer_only: bool = False) -> int:
+    """Return the completion budget of a request about *conditions*."""
+    if answer_only:
+        return ANSWER_ONLY_BASE_TOKENS + ANSWER_ONLY_TOKENS_PER_CONDITION * len(conditions)
+    return MAX_TOKENS
+
+
+def answer_tokens(schema: dict, conditions: Sequence[str]) -> int:
+    """Estimate the tokens of the longest answer *schema* allows."""
+    properties = schema["json_schema"]["schema"]["properties"]
+    reasoning_chars = properties.get("reasoning", {}).get("maxLength", 0)
+    return (
+        ANSWER_ONLY_BASE_TOKENS
+        + ANSWER_ONLY_TOKENS_PER_CONDITION * len(conditions)
+        + reasoning_chars // CHARS_PER_TOKEN
+    )
+
+
+def report_budget(context_tokens: int, question: str, answer: int) -> int:
+    """Tokens left for the report in a context of *context_tokens*.
+
+    *answer* tokens are kept free for the completion.  Raises ``ValueError``
+    if the context is too small to hold a useful part of a report.
+    """
+    budget = context_tokens - PROMPT_OVERHEAD_TOKENS - estimate_tokens(question) - answer
+    if budget < MIN_PART_TOKENS:
+        raise ValueError(
+            f"a context of {context_tokens} tokens leaves only {budget} tokens "
+            "for the report; raise --context-tokens"
+        )
+    return budget
+
+
+def request_budget(
+    conditions: Sequence[str],
+    question: str | None,
+    context_tokens: int,
+    answer_only: bool = False,
+    early_stop: bool = False,
+) -> int:
+    """:func:`report_budget` of a request about *conditions* asking *question*
+    (``None``: the standard question)."""
+    answer = answer_tokens(job_schema(conditions, answer_only, early_stop), conditions)
+    return report_budget(
+        context_tokens,
+        question if question is not None else build_question(conditions),
+        min(job_max_tokens(conditions, answer_only), answer),
+    )
+
+
+def check_context_tokens(
+    requests: Iterable[tuple[Sequence[str], str | None]],
+    context_tokens: int,
+    answer_only: bool = False,
+    early_stop: bool = False,
+) -> None:
+    """Raise ``ValueError`` if any of the ``(conditions, question)`` pairs in
+    *requests* leaves too little of *context_tokens* for the report."""
+    for conditions, question in requests:
+        request_budget(conditions, question, context_tokens, answer_only, early_stop)
+
+
+SENTENCE_END = re.compile(r"(?<=[.!?\n])\s+")
+
+
+def split_report(report_text: str, max_tokens: int) -> List[str]:
+    """Split *report_text* into parts of at most *max_tokens* estimated tokens.
+
+    Parts end at sentence boundaries; a single sentence longer than a part is
+    cut where the part is full.  A report that fits is returned unchanged.
+    """
+    if estimate_tokens(report_text) <= max_tokens:
+        return [report_text]
+    max_chars = (max_tokens - 1) * CHARS_PER_TOKEN
+    parts: List[str] = []
+    current = ""
+    for sentence in SENTENCE_END.split(report_text):
+        while len(sentence) > max_chars:
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            parts.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        parts.append(current)
+    return parts
+
+
+def merge_extractions(parts: Sequence[Extraction], conditions: Sequence[str]) -> Extraction:
+    """Combine the answers about the parts of one split report.
+
+    A condition is present if any part shows it and absent only if every part
+    says so; otherwise (a part failed) its flag stays ``None``.  The reasonings
+    are joined with part markers and the token counts summed.
+    """
+    flags: Dict[str, bool | None] = {}
+    for condition in conditions:
+        values = [part.flags.get(condition) for part in parts]
+        flags[condition] = True if True in values else None if None in values else False
+    reasoning = "\n\n".join(
+        f"[Teil {number}/{len(parts)}] {part.reasoning}"
+        for number, part in enumerate(parts, 1)
+        if part.reasoning
+    )
+
+    def total(name: str) -> int | None:
+        counts = [getattr(part, name) for part in parts]
+        if all(count is None for count in counts):
+            return None
+        return sum(count or 0 for count in counts)
+
+    return Extraction(
+        reasoning or None, flags, total("prompt_tokens"), total("completion_tokens")
+    )
+
+
+def job_cost(job: Job) -> int:
+    """Estimated prompt tokens of *job*, the sort key of longest-first scheduling."""
+    question = job.question if job.question is not None else build_question(job.conditions)
+    return estimate_tokens(job.report_text) + estimate_tokens(question)
+
+
+async def analyse_reports_async(
+    jobs: Iterable[Job],
+    model: str,
+    *,
+    concurrency: int = 1,
+    cache: ResponseCache | None = None,
+    report_first: bool = False,
+    scheduler: RequestScheduler | None = None,
+    telemetry: TelemetryLog | None = None,
+    stream: bool = False,
+    endpoints: EndpointPool | None = None,
+    on_result: Callable[[int, Job, Extraction], None] | None = None,
+    temperature: float = 0.0,
+    answer_only: bool = False,
+    early_stop: bool = False,
+    longest_first: bool = False,
+    context_tokens: int | None = None,
+) -> List[Extraction]:
+    """Run *jobs* with up to *concurrency* requests in flight.
+
+    *jobs* may be a lazy iterable; results are returned in input order, and
+    *on_result* is called with ``(index, job, result)`` as each job finishes.
+    With *context_tokens*, reports too long for one server slot are split and
+    their answers merged; a job that cannot fit at all yields a failed result.
+    The remaining options are described in README.md.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    if scheduler is None:
+        scheduler = RequestScheduler(concurrency)
+
+    results: Dict[int, Extraction] = {}
+    queue: asyncio.Queue[list[tuple[int, Job]] | None] = asyncio.Queue(
+        maxsize=2 * concurrency
+    )
+    total = len(jobs) if isinstance(jobs, Sequence) else None
+    progress = tqdm(total=total, desc="Analysing reports")
+
+    split = {"reports": 0, "parts": 0}
+
+    async def producer() -> None:
+        grouped = itertools.groupby(enumerate(jobs), key=lambda i: i[1].report_text)
+        window: list[list[tuple[int, Job]]] = []
+
+        async def release() -> None:
+            if longest_first:
+                window.sort(
+                    key=lambda items: sum(job_cost(job) for _, job in items), reverse=True
+                )
+            for items in window:
+                await queue.put(items)
+            window.clear()
+
+        try:
+            while True:
+                # Reading may block on disk, so keep it off the event loop.
+                item = await asyncio.to_thread(next, grouped, None)
+                if item is None:
+                    break
+                window.append(list(item[1]))
+                if not longest_first or len(window) >= SCHEDULE_WINDOW:
+                    await release()
+            await release()
+        finally:
+            for _ in range(concurrency):
+                await queue.put(None)
+
+    async def run(job: Job) -> Extraction:
+        schema = job_schema(job.conditions, answer_only, early_stop)
+        max_tokens = job_max_tokens(job.conditions, answer_only)
+
+        async def ask(report_text: str, report_id: str) -> Extraction:
+            trace = RequestTrace(report_id, job.conditions, time.perf_counter())
+            result = await extract_async(
+                report_text,
+                job.conditions,
+                model=model,
+                schema=schema,
+                temperature=temperature,
+                cache=cache,
+                report_first=report_first,
+                scheduler=scheduler,
+                trace=trace,
+                stream=stream,
+                endpoints=endpoints,
+                question=job.question,
+                seed=job.seed,
+                max_tokens=max_tokens,
+                early_stop=early_stop,
+            )
+            if telemetry is not None:
+                telemetry.write(trace)
+            return result
+
+        if context_tokens is None:
+            return await ask(job.report_text, job.report_id)
+        try:
+            budget = request_budget(
+                job.conditions, job.question, context_tokens, answer_only, early_stop
+            )
+        except ValueError as exc:
+            # one oversized question must not bring down the whole batch
+            logging.error("Report %s not sent: %s", job.report_id, exc)
+            return Extraction(None, {c: None for c in job.conditions})
+        parts = split_report(job.report_text, budget)
+        if len(parts) == 1:
+            return await ask(job.report_text, job.report_id)
+        logging.debug("Report %s split into %d parts", job.report_id, len(parts))
+        split["reports"] += 1
+        split["parts"] += len(parts)
+        answers = await asyncio.gather(
+            *(ask(part, f"{job.report_id}#{number}") for number, part in enumerate(parts, 1))
+        )
+        return merge_extractions(answers, job.conditions)
+
+    async def worker() -> None:
+        while True:
+            items = await queue.get()
+            if items is None:
+                return
+            for index, job in items:
+                results[index] = await run(job)
+                if on_result is not None:
+                    on_result(index, job, results[index])
+                progress.update()
+
+    # One shared HTTP session keeps connections to the server alive between
+    # requests instead of opening a new one per call.
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        token = openai.aiosession.set(session)
+        monitor = None
+        if endpoints is not None:
+            monitor = asyncio.create_task(endpoints.monitor(session))
+        try:
+            await asyncio.gather(producer(), *(worker() for _ in range(concurrency)))
+        finally:
+            if monitor is not None:
+                monitor.cancel()
+            openai.aiosession.reset(token)
+            progress.close()
+
+    logging.info(
+        "Scheduler: %d retries, final concurrency limit %d of %d",
+        scheduler.retries,
+        int(scheduler.limit),
+        scheduler.max_concurrency,
+    )
+    if split["reports"]:
+        logging.info(
+            "%d requests exceeded the context of %d tokens and were split into %d parts",
+            split["reports"],
+            context_tokens,
+            split["parts"],
+        )
+    for endpoint in endpoints.endpoints if endpoints is not None else ():
+        logging.info(
+            "Endpoint %s: %d requests%s",
+            endpoint.api_base,
+            endpoint.requests,
+            "" if endpoint.healthy else " (unhealthy)",
+        )
+    return [results[index] for index in range(len(results))]
+
+
+def output_columns(group: Sequence[str], n_groups: int) -> Dict[str, str]:
+    """Name the CSV columns holding the answer to the request about *group*.
+
+    A run with a single request per report keeps the plain ``reasoning`` /
+    ``prompt_tokens`` / ``completion_tokens`` names; otherwise they are
+    suffixed with the condition so that every request gets its own columns.
+    """
+    suffix = "" if n_groups == 1 else f"_{flag_key(group[0])}"
+    return {
+        "reasoning": f"reasoning{suffix}",
+        "prompt_tokens": f"prompt_tokens{suffix}",
+        "completion_tokens": f"completion_tokens{suffix}",
+    }
+
+
+def load_checkpoint(
+    output_path: Path,
+    groups: Sequence[tuple[str, ...]],
+    id_column: str = "id",
+) -> Dict[tuple[str, tuple[str, ...]], Extraction]:
+    """Read the completed results of a previous (partial) run of *output_path*.
+
+    Results are keyed by ``(id, condition group)``.  Only answers carrying
+    every flag of their group are returned – failures are left out on purpose
+    so that a resumed run re-queues them.  When an id appears more than once
+    the most recent complete row wins.
+    """
+    if not output_path.exists():
+        return {}
+
+    previous = pd.read_csv(
+        output_path, dtype=str, keep_default_na=False
+    )
+
+    done: Dict[tuple[str, tuple[str, ...]], Extraction] = {}
+    for group in groups:
+        columns = output_columns(group, len(groups))
+        keys = [flag_key(c) for c in group]
+        if not set(keys) <= set(previous.columns):
+            continue
+        for _, row in previous.iterrows():
+            if any(row[k] not in ("True", "False") for k in keys):
+                continue
+            tokens = [
+                int(row[columns[name]]) if row.get(columns[name]) else None
+                for name in ("prompt_tokens", "completion_tokens")
+            ]
+            done[(row[id_column], group)] = Extraction(
+                row.get(columns["reasoning"]) or None,
+                {c: row[flag_key(c)] == "True" for c in group},
+                *tokens,
+            )
+    return done
 
 
 def batch_analyse(
@@ -139,30 +1693,138 @@ def batch_analyse(
     *,
     id_column: str = "id",
     text_column: str = "report",
+    conditions: Sequence[str] = ("Depression",),
+    multi_condition: bool = False,
+    concurrency: int = 1,
+    report_first: bool = False,
+    resume: bool = False,
+    cache: ResponseCache | None = None,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    tokens_per_minute: int | None = None,
+    stream: bool = False,
+    endpoints: Sequence[str] | None = None,
+    answer_only: bool = False,
+    early_stop: bool = False,
+    reference_telemetry: Path | None = None,
+    longest_first: bool = False,
+    context_tokens: int | None = None,
 ) -> None:
-    """Run the depression screen over *input_path* and persist *output_path*.
+    """Screen *input_path* for *conditions* and persist *output_path*.
 
-    The XLSX file is expected to contain at least two columns: an *identifier*
-    (default name ``id``) and the *report text* (default name ``report``).
+    The XLSX, CSV or Parquet file must contain an *id_column* and a
+    *text_column*.  Finished requests are appended to *output_path* as they
+    complete, and the file is rewritten in input order at the end.  Raises
+    ``ValueError`` for missing columns, duplicate ids or a *context_tokens*
+    too small for the questions, before the output is touched.  The remaining
+    options are described in README.md.
     """
-    df = pd.read_excel(input_path, engine="openpyxl")
+    groups = condition_groups(conditions, multi_condition)
+    if context_tokens is not None:
+        check_context_tokens(
+            [(group, None) for group in groups], context_tokens, answer_only, early_stop
+        )
+    # Results are keyed by id in the checkpoint, on --resume and in the final
+    # rewrite; checked (like the id and text columns) before the output is touched.
+    check_unique_ids(input_path, id_column, text_column)
 
-    reasonings: List[str | None] = []
-    flags: List[bool | None] = []
+    header = [id_column]
+    for group in groups:
+        columns = output_columns(group, len(groups))
+        header += [columns["reasoning"], *(flag_key(c) for c in group)]
+        header += [columns["prompt_tokens"], columns["completion_tokens"]]
 
-    for _, row in tqdm(df.iterrows(), total=len(df), desc="Analysing reports"):
-        reasoning, flag = analyse_report(
-            str(row[text_column]), model=model, schema=SCHEMA_WITH_REASONING
-        )
-        reasonings.append(reasoning)
-        flags.append(flag)
+    done = load_checkpoint(output_path, groups, id_column) if resume else {}
+    if resume:
+        logging.info("Resuming: %d requests already done", len(done))
+
+    def pending() -> Iterator[Job]:
+        # Requests for the same report are queued back to back.
+        for row_id, report_text in iter_reports(input_path, id_column, text_column):
+            for group in groups:
+                if (row_id, group) not in done:
+                    yield Job(report_text, group, row_id)
+
+    def row_for(row_id: str, group: tuple[str, ...], result: Extraction) -> dict:
+        columns = output_columns(group, len(groups))
+        row = {id_column: row_id, columns["reasoning"]: result.reasoning}
+        row.update({flag_key(c): flag for c, flag in result.flags.items()})
+        row[columns["prompt_tokens"]] = result.prompt_tokens
+        row[columns["completion_tokens"]] = result.completion_tokens
+        return row
 
-    df["reasoning"] = reasonings
-    df["depression"] = flags
+    telemetry = TelemetryLog(TelemetryLog.path_for(output_path), append=resume)
+    with telemetry, output_path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=header)
+        writer.writeheader()
+        for (row_id, group), result in done.items():
+            writer.writerow(row_for(row_id, group, result))
+        handle.flush()
 
-    df.to_csv(output_path, index=False)
+        analysed: set[str] = set()
+
+        def checkpoint(index: int, job: Job, result: Extraction) -> None:
+            done[(job.report_id, job.conditions)] = result
+            analysed.add(job.report_id)
+            writer.writerow(row_for(job.report_id, job.conditions, result))
+            handle.flush()
+
+        results = asyncio.run(
+            analyse_reports_async(
+                pending(),
+                model=model,
+                concurrency=concurrency,
+                cache=cache,
+                report_first=report_first,
+                scheduler=RequestScheduler(
+                    concurrency,
+                    max_retries=max_retries,
+                    tokens_per_minute=tokens_per_minute,
+                ),
+                telemetry=telemetry,
+                stream=stream,
+                endpoints=EndpointPool(endpoints) if endpoints else None,
+                on_result=checkpoint,
+                answer_only=answer_only,
+                early_stop=early_stop,
+                longest_first=longest_first,
+                context_tokens=context_tokens,
+            )
+        )
+
+    # Write next to the checkpoint first so an interruption here cannot
+    # destroy the rows collected so far.
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    with tmp_path.open("w", newline="", encoding="utf-8") as handle:
+        writer = None
+        for row in iter_rows(input_path):
+            row_id = str(row[id_column])
+            for group in groups:
+                row.update(row_for(row_id, group, done[(row_id, group)]))
+            if writer is None:
+                writer = csv.DictWriter(handle, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow(row)
+    os.replace(tmp_path, output_path)
     logging.info("Saved results to %s", output_path)
 
+    prompt_tokens = sum(r.prompt_tokens or 0 for r in results)
+    completion_tokens = sum(r.completion_tokens or 0 for r in results)
+    logging.info(
+        "Token usage of %d requests: %d prompt, %d completion (%.0f prompt tokens per report)",
+        len(results),
+        prompt_tokens,
+        completion_tokens,
+        prompt_tokens / max(len(analysed), 1),
+    )
+    log_summary(telemetry.summary())
+    if reference_telemetry is not None:
+        log_latency_saved(
+            latency_saved(telemetry.records, reference_telemetry), reference_telemetry
+        )
+    logging.info("Request telemetry written to %s", telemetry.path)
+    if cache is not None:
+        logging.info("Response cache: %d hits, %d misses", cache.hits, cache.misses)
+
 # ---------------------------------------------------------------------------
 # ENTRY POINT ----------------------------------------------------------------
 # ---------------------------------------------------------------------------
@@ -175,7 +1837,7 @@ def parse_args() -> argparse.Namespace:  # noqa: D401 – imperatives are fine
         "--input",
         type=Path,
         required=True,
-        help="Path to the input XLSX file containing anamnesis reports.",
+        help="Path to the input XLSX, CSV or Parquet file containing anamnesis reports.",
     )
     parser.add_argument(
         "--output",
@@ -188,13 +1850,141 @@ def parse_args() -> argparse.Namespace:  # noqa: D401 – imperatives are fine
         default="llama-3.3-70b-instruct-q4km",
         help="Model identifier for the ChatCompletion call.",
     )
+    parser.add_argument(
+        "--conditions",
+        nargs="+",
+        default=["Depression"],
+        choices=CONDITIONS,
+        metavar="CONDITION",
+        help="Conditions to screen for (default: Depression); any of: "
+        + ", ".join(CONDITIONS),
+    )
+    parser.add_argument(
+        "--all-conditions",
+        action="store_true",
+        help="Screen for every entry of CONDITIONS.",
+    )
+    parser.add_argument(
+        "--multi-condition",
+        action="store_true",
+        help="Ask about all conditions in a single request per report.",
+    )
+    parser.add_argument(
+        "--report-first",
+        action="store_true",
+        help="Place the report before the question so that questions about the "
+        "same report reuse the server's KV cache.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Maximum number of requests kept in flight; match the server's "
+        "parallel slots.  Lowered automatically while the server is overloaded.",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help="Retries per request for timeouts and 5xx/429 errors.",
+    )
+    parser.add_argument(
+        "--tokens-per-minute",
+        type=int,
+        default=None,
+        help="Optional cap on prompt plus completion tokens per minute.",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream answers to measure the time to first byte.",
+    )
+    parser.add_argument(
+        "--answer-only",
+        action="store_true",
+        help="Ask for the booleans only, without reasoning, with a small token budget.",
+    )
+    parser.add_argument(
+        "--early-stop",
+        action="store_true",
+        help="Stream answers with the flags first and close each request as soon "
+        "as they have arrived (no reasoning is kept).",
+    )
+    parser.add_argument(
+        "--reference-telemetry",
+        type=Path,
+        default=None,
+        help="Telemetry sidecar of a full reasoning run; report the latency saved against it.",
+    )
+    parser.add_argument(
+        "--longest-first",
+        action="store_true",
+        help="Send the longest reports first to shorten the tail of the batch.",
+    )
+    parser.add_argument(
+        "--context-tokens",
+        type=int,
+        default=None,
+        help="Context size of one server slot (llama.cpp -c divided by --parallel); "
+        "longer reports are split and the answers merged.",
+    )
+    parser.add_argument(
+        "--endpoints",
+        nargs="+",
+        default=None,
+        metavar="URL",
+        help="API base URLs of several llama.cpp servers to balance requests "
+        "across (default: OPENAI_API_BASE only).  --concurrency is the total.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Keep finished rows of an existing --output and only rerun the rest.",
+    )
+    parser.add_argument(
+        "--cache-path",
+        type=Path,
+        default=DEFAULT_CACHE_PATH,
+        help="SQLite file holding cached model answers.",
+    )
+    parser.add_argument(
+        "--cache-size-mb",
+        type=int,
+        default=DEFAULT_CACHE_SIZE_MB,
+        help="Evict least recently used answers once the cache exceeds this size.",
+    )
+    cache_mode = parser.add_mutually_exclusive_group()
+    cache_mode.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Neither read nor write the response cache.",
+    )
+    cache_mode.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached answers but store the fresh ones.",
+    )
     parser.add_argument(
         "--log-level",
         default="INFO",
         choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
         help="Set the logging verbosity level.",
     )
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.reference_telemetry is not None and not args.reference_telemetry.is_file():
+        parser.error(f"--reference-telemetry {args.reference_telemetry} does not exist")
+    if args.context_tokens is not None:
+        conditions = CONDITIONS if args.all_conditions else args.conditions
+        try:
+            check_context_tokens(
+                [(group, None) for group in condition_groups(conditions, args.multi_condition)],
+                args.context_tokens,
+                args.answer_only,
+                args.early_stop,
+            )
+        except ValueError as error:
+            parser.error(str(error))
+    return args
 
 
 
@@ -205,13 +1995,39 @@ def main() -> None:  # noqa: D401 – imperatives are fine
     args = parse_args()
     logging.basicConfig(level=args.log_level, format="%(levelname)s: %(message)s")
 
-    configure_openai()  # uses env vars
+    # uses env vars unless endpoints are given on the command line
+    configure_openai(api_base=args.endpoints[0] if args.endpoints else None)
 
-    batch_analyse(
-        input_path=args.input,
-        output_path=args.output,
-        model=args.model,
-    )
+    cache = None
+    if not args.no_cache:
+        cache = ResponseCache(
+            args.cache_path, args.cache_size_mb * 1024**2, refresh=args.refresh
+        )
+
+    try:
+        batch_analyse(
+            input_path=args.input,
+            output_path=args.output,
+            model=args.model,
+            conditions=CONDITIONS if args.all_conditions else args.conditions,
+            multi_condition=args.multi_condition,
+            concurrency=args.concurrency,
+            report_first=args.report_first,
+            max_retries=args.max_retries,
+            tokens_per_minute=args.tokens_per_minute,
+            stream=args.stream,
+            endpoints=args.endpoints,
+            answer_only=args.answer_only,
+            early_stop=args.early_stop,
+            reference_telemetry=args.reference_telemetry,
+            longest_first=args.longest_first,
+            context_tokens=args.context_tokens,
+            resume=args.resume,
+            cache=cache,
+        )
+    finally:
+        if cache is not None:
+            cache.close()
 
 
 if __name__ == "__main__":
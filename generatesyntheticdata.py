@@ -0,0 +1,187 @@
+"""generatesyntheticdata.py
+
+Synthetic input for :mod:`statisticalanalysis` of any size.
+
+Writes a ``GT_eng.csv`` with one boolean column per domain and a
+``run<r>/prompts1-<P>_<Domain>.csv`` tree with ``Prompt N`` / ``Prompt N
+Reasoning`` columns, in the layout that :mod:`sweepprompts` produces.  The
+ground truth of every domain is drawn with ``--prevalence``; every prompt of
+every domain gets a sensitivity and a specificity drawn uniformly from
+``--accuracy`` and answers each run independently with them, so runs differ
+as real sampled runs do.  The same ``--seed`` always gives the same files.
+
+Usage
+-----
+$ python generatesyntheticdata.py --output-root synthetic --patients 1000 \
+    --domains 12 --prompts 20 --runs 3 --prevalence 0.2 --accuracy 0.6 0.95
+$ python statisticalanalysis.py --root synthetic --iterations 2000
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# ---------------------------------------------------------------------------
+# CONSTANTS ------------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+# English domain names as in GT_eng.csv; further domains are numbered
+DOMAINS = [
+    "Addiction",
+    "Anxiety",
+    "Depression",
+    "SelfEndangerment",
+    "Aggression",
+    "CognitiveImpairment",
+    "Mania",
+    "PositiveSymptoms",
+    "NegativeSymptoms",
+    "Sleep",
+    "SelfHarm",
+    "Suicidality",
+]
+FIRST_PATIENT_ID = 1000
+REASONING_TEXT = "Synthetische Begründung ohne inhaltliche Aussage. "
+
+# ---------------------------------------------------------------------------
+# GENERATOR ------------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+
+def domain_names(n_domains: int) -> list[str]:
+    """The first *n_domains* domain names, numbered beyond the known ones."""
+    return (DOMAINS + [f"Domain{i}" for i in range(len(DOMAINS) + 1, n_domains + 1)])[
+        :n_domains
+    ]
+
+
+def generate(
+    output_root: Path,
+    *,
+    patients: int = 300,
+    domains: int = 3,
+    prompts: int = 4,
+    runs: int = 3,
+    prevalence: float = 0.2,
+    accuracy: tuple[float, float] = (0.6, 0.95),
+    reasoning_chars: int = 80,
+    seed: int = 0,
+) -> dict:
+    """Write a synthetic ground truth and run*/ tree below *output_root*.
+
+    Returns the drawn ``sensitivity`` and ``specificity`` per domain as
+    arrays (runs share them; only the answers are drawn per run).
+    """
+    rng = np.random.default_rng(seed)
+    names = domain_names(domains)
+    ids = np.arange(FIRST_PATIENT_ID, FIRST_PATIENT_ID + patients)
+
+    truth = rng.random((patients, domains)) < prevalence
+    output_root.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame(truth, columns=names).assign(id=ids)[["id", *names]].to_csv(
+        output_root / "GT_eng.csv", index=False
+    )
+
+    low, high = accuracy
+    sensitivity = rng.uniform(low, high, size=(domains, prompts))
+    specificity = rng.uniform(low, high, size=(domains, prompts))
+    reasoning = (REASONING_TEXT * (reasoning_chars // len(REASONING_TEXT) + 1))[
+        :reasoning_chars
+    ]
+
+    for run in range(1, runs + 1):
+        run_dir = output_root / f"run{run}"
+        run_dir.mkdir(exist_ok=True)
+        for d, name in enumerate(names):
+            # P(answer True) is the sensitivity for positives, 1 - specificity otherwise
+            p_true = np.where(truth[:, [d]], sensitivity[d], 1 - specificity[d])
+            answers = rng.random((patients, prompts)) < p_true
+            columns = {"id": ids}
+            for k in range(prompts):
+                columns[f"Prompt {k + 1}"] = answers[:, k]
+                if reasoning_chars:
+                    columns[f"Prompt {k + 1} Reasoning"] = reasoning
+            pd.DataFrame(columns).to_csv(
+                run_dir / f"prompts1-{prompts}_{name}.csv", index=False
+            )
+    logging.info(
+        "Wrote %d patients x %d domains x %d prompts x %d runs to %s",
+        patients,
+        domains,
+        prompts,
+        runs,
+        output_root,
+    )
+    return {"sensitivity": sensitivity, "specificity": specificity}
+
+
+# ---------------------------------------------------------------------------
+# ENTRY POINT ----------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Write synthetic GT_eng.csv and run*/ CSVs for statisticalanalysis.py."
+    )
+    parser.add_argument("--output-root", type=Path, required=True)
+    parser.add_argument("--patients", type=int, default=300)
+    parser.add_argument(
+        "--domains", type=int, default=3, help=f"Number of domains (names for up to {len(DOMAINS)})."
+    )
+    parser.add_argument("--prompts", type=int, default=4, help="Prompts per domain.")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument(
+        "--prevalence", type=float, default=0.2, help="Share of positive labels per domain."
+    )
+    parser.add_argument(
+        "--accuracy",
+        type=float,
+        nargs=2,
+        default=(0.6, 0.95),
+        metavar=("LOW", "HIGH"),
+        help="Range of the per-prompt sensitivity and specificity.",
+    )
+    parser.add_argument(
+        "--reasoning-chars",
+        type=int,
+        default=80,
+        help="Length of the reasoning columns (0: leave them out).",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="Logging verbosity",
+    )
+    args = parser.parse_args()
+    if not 0 <= args.prevalence <= 1:
+        parser.error("--prevalence must lie in [0, 1]")
+    if not 0 <= args.accuracy[0] <= args.accuracy[1] <= 1:
+        parser.error("--accuracy needs 0 <= LOW <= HIGH <= 1")
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level, format="%(levelname)s: %(message)s")
+    generate(
+        args.output_root,
+        patients=args.patients,
+        domains=args.domains,
+        prompts=args.prompts,
+        runs=args.runs,
+        prevalence=args.prevalence,
+        accuracy=tuple(args.accuracy),
+        reasoning_chars=args.reasoning_chars,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
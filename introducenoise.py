@@ -4,18 +4,48 @@
 # https://doi.org/10.48550/arXiv.2412.03556
 # -----------------------------------------------------------------
 
+import argparse
 import csv
-import random
+import hashlib
+import itertools
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 
-file_path = "ClickBrick_Prompting_table_v2.csv"  # Change to your actual file path
-sigma_value = 0.5  # Adjust this value as needed
+import numpy as np
 
-# Read the file:
-with open(file_path, "r", newline="", encoding="utf-8") as infile:
-    reader = csv.reader(infile)
-    rows = list(reader)
+DEFAULT_INPUT = "ClickBrick_Prompting_table_v2.csv"
+DEFAULT_SIGMAS = [0.5]
+DEFAULT_SEEDS = [0]
+DEFAULT_COMBOS = ["scramble+capitalize"]
+ROWS_PER_TASK = 16  # prompt rows sent to a worker process at once
 
-def apply_word_scrambling(text: str, sigma: float) -> str:
+# Every transform works on the text as an array of Unicode code points and
+# draws all of its random numbers at once from a NumPy Generator seeded with
+# (seed, transform, text).  The same (seed, sigma, text) therefore always gives
+# the same output, whatever else has been generated before, and for a fixed
+# seed a larger sigma only adds changes on top of those of a smaller one.
+TRANSFORM_SALT = {"scramble": 1, "capitalize": 2, "ascii": 3}
+
+
+def text_rng(text: str, seed: int, transform: str) -> np.random.Generator:
+    """Generator for one transform of one text, independent of call order."""
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+    return np.random.default_rng(
+        [seed, TRANSFORM_SALT[transform], int.from_bytes(digest, "little")]
+    )
+
+
+def to_codes(text: str) -> np.ndarray:
+    return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+
+
+def from_codes(codes: np.ndarray) -> str:
+    return codes.astype(np.uint32).tobytes().decode("utf-32-le")
+
+
+def apply_word_scrambling(text: str, sigma: float, seed: int = 0) -> str:
     """
     Scrambles the middle characters of words longer than 3 characters in the input text.
     The probability of scrambling is determined by sigma.
@@ -25,39 +55,47 @@ def apply_word_scrambling(text: str, sigma: float) -> str:
     Output: "The qiuck bwron fox jpums"
     """
     words = text.split()
-    scrambled_words = []
-    for word in words:
-        if len(word) > 3 and random.random() < sigma ** (1 / 2):
-            chars = list(word)
-            middle_chars = chars[1:-1]
-            random.shuffle(middle_chars)
-            scrambled_word = chars[0] + "".join(middle_chars) + chars[-1]
-            scrambled_words.append(scrambled_word)
-        else:
-            scrambled_words.append(word)
-    return " ".join(scrambled_words)
-
-
-def apply_random_capitalization(text: str, sigma: float) -> str:
+    if not words:
+        return ""
+    rng = text_rng(text, seed, "scramble")
+    joined = " ".join(words)
+    codes = to_codes(joined)
+
+    lengths = np.array([len(word) for word in words])
+    starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1]))
+    scrambled = (lengths > 3) & (rng.random(len(words)) < sigma ** (1 / 2))
+
+    # word index and offset inside the word of every character; the space
+    # after a word has offset == its length
+    word_of = np.repeat(np.arange(len(words)), lengths + 1)[: len(codes)]
+    offset = np.arange(len(codes)) - starts[word_of]
+    middle = scrambled[word_of] & (offset > 0) & (offset < lengths[word_of] - 1)
+
+    # shuffle the middle characters of each word: sort them by (word, random key)
+    keys = rng.random(len(codes))
+    positions = np.flatnonzero(middle)
+    order = np.arange(len(codes))
+    order[positions] = positions[np.lexsort((keys[positions], word_of[positions]))]
+    return from_codes(codes[order])
+
+
+def apply_random_capitalization(text: str, sigma: float, seed: int = 0) -> str:
     """
     Randomly capitalizes letters in the input text.
 
     Input: "The quick brown fox jumps"
     Output: "The qUick bRoWn fOx jUmps"
     """
-    new_text = []
-    for c in text:
-        if c.isalpha() and random.random() < sigma ** (1 / 2):
-            if "a" <= c <= "z":
-                new_text.append(chr(ord(c) - 32))  # Convert to uppercase
-            elif "A" <= c <= "Z":
-                new_text.append(chr(ord(c) + 32))  # Convert to lowercase
-        else:
-            new_text.append(c)
-    return "".join(new_text)
-
-
-def apply_ascii_noising(text: str, sigma: float) -> str:
+    rng = text_rng(text, seed, "capitalize")
+    codes = to_codes(text)
+    letter = ((codes >= ord("a")) & (codes <= ord("z"))) | (
+        (codes >= ord("A")) & (codes <= ord("Z"))
+    )
+    flip = letter & (rng.random(len(codes)) < sigma ** (1 / 2))
+    return from_codes(np.where(flip, codes ^ 32, codes))  # swap ASCII case
+
+
+def apply_ascii_noising(text: str, sigma: float, seed: int = 0) -> str:
     """
     Perturbs the ASCII characters of the input text.
 
@@ -65,43 +103,154 @@ def apply_ascii_noising(text: str, sigma: float) -> str:
     Input: "The quick brown fox jumps"
     Output: "Tge quick brown fox junps"
     """
-    new_text = []
-    for c in text:
-        if c.isprintable() and random.random() < sigma**3:
-            perturbation = random.choice([-1, 1])
-            new_char_code = ord(c) + perturbation
-            # Ensure new character is printable ASCII
-            if 32 <= new_char_code <= 126:
-                new_text.append(chr(new_char_code))
-            else:
-                new_text.append(c)
-        else:
-            new_text.append(c)
-    return "".join(new_text)
-
-# Write back to the file with additional modified rows
-with open(file_path, "w", newline="", encoding="utf-8") as outfile:
-    writer = csv.writer(outfile)
-
-    # Write header row first (unchanged)
-    writer.writerow(rows[0])
-
-    for row in rows[1:]: # Skip first row (headers)
-        writer.writerow(row)  # Write the original row
+    rng = text_rng(text, seed, "ascii")
+    codes = to_codes(text).astype(np.int64)
+    hit = rng.random(len(codes)) < sigma**3
+    perturbed = codes + rng.choice([-1, 1], size=len(codes))
+    # Ensure new character is printable ASCII
+    keep = hit & (codes >= 32) & (codes <= 126) & (perturbed >= 32) & (perturbed <= 126)
+    return from_codes(np.where(keep, perturbed, codes))
+
+
+TRANSFORMS = {
+    "scramble": apply_word_scrambling,
+    "capitalize": apply_random_capitalization,
+    "ascii": apply_ascii_noising,
+}
+
+
+def apply_noise(text: str, sigma: float, seed: int = 0,
+                transforms=("scramble", "capitalize")) -> str:
+    """Applies the named transforms one after another."""
+    for name in transforms:
+        text = TRANSFORMS[name](text, sigma, seed)
+    return text
+
 
+def parse_combo(combo: str) -> tuple:
+    """"scramble+capitalize" -> ("scramble", "capitalize")."""
+    names = tuple(combo.split("+"))
+    unknown = [name for name in names if name not in TRANSFORMS]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown transform(s) {unknown}; choose from {sorted(TRANSFORMS)}"
+        )
+    return names
+
+
+def variant_grid(sigmas, seeds, combos):
+    """All (sigma, seed, transforms) combinations, in a fixed order."""
+    return list(itertools.product(sigmas, seeds, combos))
+
+
+def variant_label(base_name: str, sigma: float, seed: int, transforms) -> str:
+    """Deterministic row label, e.g. "Prompt 3_scramble+capitalize_sigma0.5_seed0"."""
+    return f"{base_name}_{'+'.join(transforms)}_sigma{sigma:g}_seed{seed}"
+
+
+def noisy_rows(rows, grid, keep_original=True):
+    """Each input row, followed by one noisy row per grid entry."""
+    out = []
+    for row in rows:
+        if keep_original:
+            out.append(row)  # Write the original row
         # Use the first column value as the base name for new rows
         base_name = row[0]
+        for sigma, seed, transforms in grid:
+            out.append(
+                [variant_label(base_name, sigma, seed, transforms)]
+                + [apply_noise(cell, sigma, seed, transforms) for cell in row[1:]]
+            )
+    return out
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def generate_variants(rows, grid, workers=1, keep_original=True):
+    """Yield output rows in input order, computing them on *workers* processes.
+    At most 2 * workers batches are in flight, so the table is never held in
+    memory as a whole."""
+    batches = batched(rows, ROWS_PER_TASK)
+    if workers <= 1:
+        for batch in batches:
+            yield from noisy_rows(batch, grid, keep_original)
+        return
+
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append(pool.submit(noisy_rows, batch, grid, keep_original))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def noise_table(input_path, output_path, grid, workers=1, keep_original=True):
+    """Stream the prompt table from *input_path* to *output_path* with noisy
+    variants added. The input file is never modified."""
+    if Path(input_path).resolve() == Path(output_path).resolve():
+        raise ValueError("--output must differ from --input; the input is not rewritten")
+
+    n_rows = 0
+    with open(input_path, "r", newline="", encoding="utf-8") as infile, open(
+        output_path, "w", newline="", encoding="utf-8"
+    ) as outfile:
+        reader = csv.reader(infile)
+        writer = csv.writer(outfile)
+
+        # Write header row first (unchanged)
+        writer.writerow(next(reader))
+        for row in generate_variants(reader, grid, workers, keep_original):
+            writer.writerow(row)
+            n_rows += 1
+    return n_rows
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Write noisy variants of the prompt table to a new CSV file."
+    )
+    parser.add_argument("--input", default=DEFAULT_INPUT, help="Prompt table (CSV).")
+    parser.add_argument(
+        "--output", help="Output CSV (default: <input stem>_noisy.csv next to the input)."
+    )
+    parser.add_argument(
+        "--sigmas", nargs="+", type=float, default=DEFAULT_SIGMAS, help="Noise levels."
+    )
+    parser.add_argument("--seeds", nargs="+", type=int, default=DEFAULT_SEEDS, help="Seeds.")
+    parser.add_argument(
+        "--combos",
+        nargs="+",
+        type=parse_combo,
+        default=[parse_combo(c) for c in DEFAULT_COMBOS],
+        help="Transform combinations, '+'-joined from: " + ", ".join(TRANSFORMS),
+    )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(), help="Worker processes."
+    )
+    parser.add_argument(
+        "--no-original",
+        action="store_true",
+        help="Only write the noisy rows, not the original ones.",
+    )
+    args = parser.parse_args()
+    args.output = args.output or Path(args.input).with_name(Path(args.input).stem + "_noisy.csv")
+    if Path(args.input).resolve() == Path(args.output).resolve():
+        parser.error("--output must differ from --input; the input is not rewritten")
+    return args
+
+
+def main():
+    args = parse_args()
+    grid = variant_grid(args.sigmas, args.seeds, args.combos)
+    n_rows = noise_table(args.input, args.output, grid, args.workers, not args.no_original)
+    print(f"Wrote {n_rows} rows ({len(grid)} variant(s) per prompt) to {args.output}")
+
 
-        # scrambled_row = [f"{base_name}_Scrambled"] + [apply_word_scrambling(cell, sigma_value) for cell in row[1:]]
-        # writer.writerow(scrambled_row)  # Write scrambled row with label
-        
-        # capitalized_row = [f"{base_name}_Capitalized"] + [apply_random_capitalization(cell, sigma_value) for cell in row[1:]]
-        # writer.writerow(capitalized_row)  # Write capitalized row with label
-        
-        both_modified_row = [f"{base_name}_Scrambled"] + [
-            apply_random_capitalization(apply_word_scrambling(cell, sigma_value), sigma_value) for cell in row[1:]
-        ]
-        writer.writerow(both_modified_row)  # Write row with both transformations and label
-        
-
-print("Scrambled content added as a new line for each row in the file!")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,435 @@
+"""mockllmserver.py
+
+Offline stand-in for the OpenAI-compatible ``/v1/chat/completions`` endpoint
+of a llama.cpp server, so that the extraction pipeline can be exercised and
+benchmarked on a CPU-only machine without a model.
+
+Answers are random but valid against the JSON schema sent in
+``response_format`` (e.g. :data:`extractinformation.SCHEMA_WITH_REASONING`).
+Like llama.cpp the server processes at most ``--slots`` requests at a time and
+queues the rest; every request takes a latency drawn from a configurable
+distribution plus ``--prefill-seconds-per-token`` for every prompt token (the
+time to first token) and ``--seconds-per-token`` for every generated token,
+and ``--error-rate`` of the requests are rejected with HTTP 503.  With
+``--context-tokens`` prompts longer than a slot's context are refused with
+HTTP 400, as llama.cpp does.  A client closing a streamed request
+early frees its slot at once, as with the real server.
+``stream=true`` is answered with server-sent events, including the usage chunk
+requested by ``stream_options.include_usage``.
+
+Usage
+-----
+$ python mockllmserver.py --port 8080 --slots 4 \
+    --latency lognormal --latency-mean 0.5 --error-rate 0.01
+
+Only the standard library is required.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ---------------------------------------------------------------------------
+# CONSTANTS ------------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+DEFAULT_PORT = 8080
+DEFAULT_SLOTS = 4
+DEFAULT_LATENCY_MEAN = 0.2  # seconds to the first token, queueing excluded
+DEFAULT_SECONDS_PER_TOKEN = 0.0  # decode time per generated token
+DEFAULT_PREFILL_SECONDS_PER_TOKEN = 0.0  # processing time per prompt token
+DEFAULT_REASONING_CHARS = 400
+CHARS_PER_TOKEN = 4  # same rough estimate as extractinformation.py
+STREAM_CHUNK_CHARS = 16  # characters per streamed delta
+
+LATENCY_DISTRIBUTIONS = ("fixed", "exponential", "lognormal")
+
+FILLER = (
+    "Der Bericht beschreibt gedrückte Stimmung, Antriebsminderung und "
+    "Schlafstörungen über mehrere Wochen; eine abschließende Beurteilung "
+    "stützt sich auf die geschilderten Symptome. "
+)
+
+# ---------------------------------------------------------------------------
+# FAKE ANSWERS ---------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+
+def fake_value(schema: dict, rng: random.Random, reasoning_chars: int):
+    """Return a random value that validates against *schema*.
+
+    Covers the subset of JSON Schema used by structured outputs: objects,
+    arrays, strings, booleans, numbers, integers and enums.
+    """
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+    kind = schema.get("type", "object")
+    if kind == "object":
+        properties = schema.get("properties", {})
+        return {
+            name: fake_value(sub, rng, reasoning_chars)
+            for name, sub in properties.items()
+        }
+    if kind == "array":
+        count = max(schema.get("minItems", 1), 1)
+        return [fake_value(schema.get("items", {}), rng, reasoning_chars) for _ in range(count)]
+    if kind == "string":
+        length = min(reasoning_chars, schema.get("maxLength", reasoning_chars))
+        length = max(length, schema.get("minLength", 0))
+        return (FILLER * (length // len(FILLER) + 1))[:length]
+    if kind == "boolean":
+        return rng.random() < 0.5
+    if kind == "integer":
+        return rng.randint(schema.get("minimum", 0), schema.get("maximum", 100))
+    if kind == "number":
+        return rng.uniform(schema.get("minimum", 0.0), schema.get("maximum", 1.0))
+    return None
+
+
+def fake_content(body: dict, rng: random.Random, reasoning_chars: int) -> str:
+    """JSON answer for the chat completion request *body*."""
+    response_format = body.get("response_format") or {}
+    schema = response_format.get("json_schema", {}).get("schema")
+    if schema is None:
+        return FILLER[:reasoning_chars]
+    return json.dumps(fake_value(schema, rng, reasoning_chars), ensure_ascii=False)
+
+
+def prompt_tokens_for(body: dict) -> int:
+    prompt = sum(len(m.get("content") or "") for m in body.get("messages", []))
+    return math.ceil(prompt / CHARS_PER_TOKEN)
+
+
+def usage_for(body: dict, content: str) -> dict:
+    prompt_tokens = prompt_tokens_for(body)
+    completion_tokens = math.ceil(len(content) / CHARS_PER_TOKEN)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+# ---------------------------------------------------------------------------
+# SERVER ---------------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+
+class MockBackend:
+    """Shared state of all request threads: slots, latency model and RNG."""
+
+    def __init__(
+        self,
+        *,
+        slots: int = DEFAULT_SLOTS,
+        latency: str = "fixed",
+        latency_mean: float = DEFAULT_LATENCY_MEAN,
+        latency_sigma: float = 0.5,
+        seconds_per_token: float = DEFAULT_SECONDS_PER_TOKEN,
+        prefill_seconds_per_token: float = DEFAULT_PREFILL_SECONDS_PER_TOKEN,
+        context_tokens: int | None = None,
+        error_rate: float = 0.0,
+        reasoning_chars: int = DEFAULT_REASONING_CHARS,
+        seed: int | None = None,
+    ) -> None:
+        if latency not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency must be one of {LATENCY_DISTRIBUTIONS}")
+        self.slots = threading.Semaphore(slots)
+        self.latency = latency
+        self.latency_mean = latency_mean
+        self.latency_sigma = latency_sigma
+        self.seconds_per_token = seconds_per_token
+        self.prefill_seconds_per_token = prefill_seconds_per_token
+        self.context_tokens = context_tokens
+        self.error_rate = error_rate
+        self.reasoning_chars = reasoning_chars
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.served = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.too_long = 0
+
+    def draw_latency(self) -> float:
+        with self._lock:
+            if self.latency == "exponential":
+                return self.rng.expovariate(1 / self.latency_mean) if self.latency_mean else 0.0
+            if self.latency == "lognormal":
+                # parametrised so that the mean equals latency_mean
+                mu = math.log(max(self.latency_mean, 1e-9)) - self.latency_sigma**2 / 2
+                return self.rng.lognormvariate(mu, self.latency_sigma)
+            return self.latency_mean
+
+    def reject(self) -> bool:
+        with self._lock:
+            rejected = self.rng.random() < self.error_rate
+            self.rejected += rejected
+            return rejected
+
+    def content(self, body: dict) -> str:
+        with self._lock:
+            self.served += 1
+            return fake_content(body, self.rng, self.reasoning_chars)
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real server
+    backend: MockBackend  # set by make_server
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002 – stdlib name
+        logging.debug("%s - %s", self.address_string(), format % args)
+
+    def send_json(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:  # noqa: N802 – stdlib name
+        if self.path.rstrip("/") in ("/health", "/v1/health"):
+            self.send_json(200, {"status": "ok"})
+        elif self.path.rstrip("/") == "/v1/models":
+            self.send_json(200, {"object": "list", "data": [{"id": "mock", "object": "model"}]})
+        else:
+            self.send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self) -> None:  # noqa: N802 – stdlib name
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if self.path.rstrip("/") not in ("/v1/chat/completions", "/chat/completions"):
+            self.send_json(404, {"error": {"message": "not found"}})
+            return
+        backend = self.backend
+        if backend.reject():
+            self.send_json(503, {"error": {"message": "server busy", "type": "unavailable"}})
+            return
+        prompt_tokens = prompt_tokens_for(body)
+        if backend.context_tokens and prompt_tokens > backend.context_tokens:
+            with backend._lock:
+                backend.too_long += 1
+            self.send_json(
+                400,
+                {
+                    "error": {
+                        "message": "the request exceeds the available context size "
+                        f"({prompt_tokens} > {backend.context_tokens} tokens)",
+                        "type": "exceed_context_size_error",
+                    }
+                },
+            )
+            return
+
+        with backend.slots:  # queue like llama.cpp's parallel slots
+            content = backend.content(body)
+            latency = backend.draw_latency() + prompt_tokens * backend.prefill_seconds_per_token
+            if body.get("stream"):
+                self.stream(body, content, latency)
+                return
+            decode = usage_for(body, content)["completion_tokens"] * backend.seconds_per_token
+            time.sleep(latency + decode)
+        self.send_json(
+            200,
+            {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "mock"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": usage_for(body, content),
+            },
+        )
+
+    def stream(self, body: dict, content: str, latency: float) -> None:
+        """Send *content* as server-sent events, the first after *latency*."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        pieces = [
+            content[i : i + STREAM_CHUNK_CHARS]
+            for i in range(0, len(content), STREAM_CHUNK_CHARS)
+        ] or [""]
+        pause = self.backend.seconds_per_token * STREAM_CHUNK_CHARS / CHARS_PER_TOKEN
+
+        def event(payload: dict | str) -> None:
+            data = payload if isinstance(payload, str) else json.dumps(payload)
+            chunk = f"data: {data}\n\n".encode("utf-8")
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.flush()
+
+        def delta(text: str | None, finish_reason: str | None = None) -> dict:
+            return {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "model": body.get("model", "mock"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "delta": {} if text is None else {"content": text},
+                        "finish_reason": finish_reason,
+                    }
+                ],
+            }
+
+        try:
+            time.sleep(latency)
+            for piece in pieces:
+                event(delta(piece))
+                time.sleep(pause)
+            event(delta(None, "stop"))
+            if (body.get("stream_options") or {}).get("include_usage"):
+                event(
+                    {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "choices": [],
+                        "usage": usage_for(body, content),
+                    }
+                )
+            event("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # the client stopped reading (e.g. early termination): stop generating
+            with self.backend._lock:
+                self.backend.cancelled += 1
+            self.close_connection = True
+
+
+def make_server(host: str, port: int, backend: MockBackend) -> ThreadingHTTPServer:
+    """Return a server answering with *backend*; call ``serve_forever()``."""
+    handler = type("BoundMockHandler", (MockHandler,), {"backend": backend})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+# ---------------------------------------------------------------------------
+# ENTRY POINT ----------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Offline OpenAI-compatible mock server returning schema-valid JSON."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--slots",
+        type=int,
+        default=DEFAULT_SLOTS,
+        help="Requests processed in parallel; further requests wait (llama.cpp -np).",
+    )
+    parser.add_argument(
+        "--latency",
+        choices=LATENCY_DISTRIBUTIONS,
+        default="fixed",
+        help="Distribution of the per-request processing time.",
+    )
+    parser.add_argument(
+        "--latency-mean", type=float, default=DEFAULT_LATENCY_MEAN, help="Mean latency in seconds."
+    )
+    parser.add_argument(
+        "--latency-sigma",
+        type=float,
+        default=0.5,
+        help="Shape of the lognormal latency (sigma of the underlying normal).",
+    )
+    parser.add_argument(
+        "--seconds-per-token",
+        type=float,
+        default=DEFAULT_SECONDS_PER_TOKEN,
+        help="Decode time added per generated token.",
+    )
+    parser.add_argument(
+        "--prefill-seconds-per-token",
+        type=float,
+        default=DEFAULT_PREFILL_SECONDS_PER_TOKEN,
+        help="Prompt processing time added per prompt token.",
+    )
+    parser.add_argument(
+        "--context-tokens",
+        type=int,
+        default=None,
+        help="Context size of a slot; longer prompts are refused with HTTP 400.",
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Share of requests answered with HTTP 503."
+    )
+    parser.add_argument(
+        "--reasoning-chars",
+        type=int,
+        default=DEFAULT_REASONING_CHARS,
+        help="Length of generated string fields (capped by the schema's maxLength).",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Seed for answers and latencies.")
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="Logging verbosity",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=args.log_level, format="%(levelname)s: %(message)s")
+    backend = MockBackend(
+        slots=args.slots,
+        latency=args.latency,
+        latency_mean=args.latency_mean,
+        latency_sigma=args.latency_sigma,
+        seconds_per_token=args.seconds_per_token,
+        prefill_seconds_per_token=args.prefill_seconds_per_token,
+        context_tokens=args.context_tokens,
+        error_rate=args.error_rate,
+        reasoning_chars=args.reasoning_chars,
+        seed=args.seed,
+    )
+    server = make_server(args.host, args.port, backend)
+    logging.info(
+        "Mock LLM server on http://%s:%d/v1 (%d slots, %s latency, mean %.3fs, %.1f%% errors)",
+        args.host,
+        server.server_address[1],
+        args.slots,
+        args.latency,
+        args.latency_mean,
+        100 * args.error_rate,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logging.info(
+            "Served %d requests, rejected %d (%d over the context size), "
+            "%d streams closed early by the client",
+            backend.served,
+            backend.rejected + backend.too_long,
+            backend.too_long,
+            backend.cancelled,
+        )
+
+
+if __name__ == "__main__":
+    main()
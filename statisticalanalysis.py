@@ -2,13 +2,17 @@
 # 0 ─── requirements ─────────────────────────────────────────────────────────
 ##############################################################################
 
-import pathlib, re, numpy as np, pandas as pd
+import argparse, hashlib, json, os, pathlib, re, numpy as np, pandas as pd
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from statsmodels.stats.multitest import multipletests
-from functools import partial
-from sklearn.utils import resample
-from sklearn.metrics import (
-    balanced_accuracy_score, precision_score, recall_score, f1_score
-)
+
+try:                                         # multithreaded CSV parser, if installed
+    import pyarrow                           # noqa: F401
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
 
 ##############################################################################
 # 1 ─── Configuration ────────────────────────────────────────────────────────
@@ -18,260 +22,942 @@ RUN_FOLDERS = sorted(ROOT.glob("run*"))      # run1, run2, run3 …
 GT_FILE   = ROOT / "GT_eng.csv"                  # adjust if the file is named differently
 PROMPT_RE = re.compile(r"^Prompt \d+$")      # boolean columns only (skip “… Reasoning”)
 
-metric_funcs = {
-    "balanced_accuracy": balanced_accuracy_score,
-    "precision": partial(precision_score, zero_division=0),
-    "recall":    partial(recall_score,    zero_division=0),
-    "f1":        partial(f1_score,        zero_division=0),
-}
-
 BOOT_ITERATIONS = 2_000                        # patient-level bootstrap size
+BOOT_CHUNK      = 250                        # replicates per matrix product / seed stream
 RANDOM_STATE    = 42                         # makes the bootstrap reproducible
+READ_WORKERS    = 8                          # threads parsing run/domain CSVs
+SKETCH_BINS     = 10_000                     # resolution of --streaming quantiles on [0, 1]
+BOOT_BATCH      = 1_000                      # --adaptive: replicates added per round
+BOOT_MAX_ITERATIONS = 50_000                 # --adaptive: hard cap per cell
+MC_TOLERANCE    = 0.002                      # --adaptive: Monte-Carlo SE of CI limits / p
 alpha = 0.05
 
+##############################################################################
+# 1 ─── Confusion-count engine ──────────────────────────────────────────────
+##############################################################################
+# Every metric is a function of the four confusion counts of a
+# (domain, prompt, run) group.  Predictions are encoded once as a
+# patients × (4 · groups) indicator matrix; a bootstrap replicate is then just
+# a vector of patient multiplicities, and the counts of all groups for a whole
+# batch of replicates are a single matrix product.
+OUTCOMES = ["tp", "fp", "fn", "tn"]
+
+def _ratio(num, den):
+    """num / den, and 0 where den == 0 (sklearn's zero_division=0)."""
+    num, den = np.broadcast_arrays(np.asarray(num, float), np.asarray(den, float))
+    return np.divide(num, den, out=np.zeros(num.shape), where=den > 0)
+
+def balanced_accuracy_from_counts(tp, fp, fn, tn):
+    # mean recall over the classes present in y_true – like sklearn, a group
+    # without positives (or negatives) scores its specificity (or sensitivity)
+    has_pos, has_neg = (tp + fn) > 0, (tn + fp) > 0
+    return _ratio(_ratio(tp, tp + fn) * has_pos + _ratio(tn, tn + fp) * has_neg,
+                  has_pos.astype(float) + has_neg)
+
+def precision_from_counts(tp, fp, fn, tn):
+    return _ratio(tp, tp + fp)
+
+def recall_from_counts(tp, fp, fn, tn):
+    return _ratio(tp, tp + fn)
+
+def f1_from_counts(tp, fp, fn, tn):
+    return _ratio(2 * tp, 2 * tp + fp + fn)
+
+metric_funcs = {
+    "balanced_accuracy": balanced_accuracy_from_counts,
+    "precision": precision_from_counts,
+    "recall":    recall_from_counts,
+    "f1":        f1_from_counts,
+}
+
+# accepted spellings of a label; anything else (a blank from a failed
+# extraction, "n/a", …) is an error, not a positive
+LABELS = {True: True, False: False, "True": True, "False": False,
+          "true": True, "false": False, "1": True, "0": False}
+
+def binary_labels(pred, column):
+    """*column* of *pred* as a bool array; raises on blank / unknown labels."""
+    values = pred[column]
+    if values.dtype == bool:
+        return values.to_numpy()
+    labels = values.map(LABELS)                      # 0/1 and 0.0/1.0 hash like False/True
+    bad    = labels.isna()
+    if bad.any():
+        keys  = ["source"] if "source" in pred else ["run", "domain"]
+        where = pred.loc[bad, keys].drop_duplicates().astype(str).agg("/".join, axis=1)
+        raise ValueError(f"{bad.sum()} blank or non-binary {column} values "
+                         f"(e.g. {values[bad].iloc[0]!r}) in: {', '.join(where)}")
+    return labels.to_numpy(bool)
+
+def encode_predictions(pred, group_cols=("domain", "prompt", "run")):
+    """Integer-encode the tidy prediction table for the count engine.
+
+    Returns
+      indicators – float matrix (n_patients, 4 · n_groups); column
+                   k · n_groups + g counts the rows of patient i with outcome
+                   OUTCOMES[k] in group g
+      averaging  – (n_groups, n_cells) matrix turning per-run values into the
+                   mean over runs of each (domain, prompt) cell
+      groups     – MultiIndex (domain, prompt, run) of the columns
+      cells      – MultiIndex (domain, prompt) of the run averages
+    """
+    group_cols = list(group_cols)
+    keyed      = pred.groupby(group_cols, sort=True, observed=True)
+    group_code = keyed.ngroup().to_numpy()
+    groups     = keyed.size().index
+    patient_code, _ = pd.factorize(pred["id"])
+
+    y_true  = binary_labels(pred, "y_true")
+    y_pred  = binary_labels(pred, "y_pred")
+    outcome = 2 * (~y_pred) + (~y_true)            # 0 tp · 1 fp · 2 fn · 3 tn
+
+    n_groups   = len(groups)
+    indicators = np.zeros((patient_code.max() + 1, len(OUTCOMES) * n_groups))
+    np.add.at(indicators, (patient_code, outcome * n_groups + group_code), 1)
+
+    cells     = groups.droplevel(group_cols[-1]).unique()
+    cell_code = cells.get_indexer(groups.droplevel(group_cols[-1]))
+    averaging = np.zeros((n_groups, len(cells)))
+    averaging[np.arange(n_groups), cell_code] = 1
+    averaging /= averaging.sum(axis=0)             # equal weight per run
+    return indicators, averaging, groups, cells
+
+def metrics_from_counts(counts, averaging):
+    """Run-averaged metrics from counts shaped (..., 4 · n_groups).
+
+    Returns {metric: array (..., n_cells)}.
+    """
+    tp, fp, fn, tn = np.moveaxis(
+        counts.reshape(*counts.shape[:-1], len(OUTCOMES), -1), -2, 0)
+    return {m: f(tp, fp, fn, tn) @ averaging for m, f in metric_funcs.items()}
+
+def bootstrap_metrics(indicators, averaging, iterations, rng, chunk=BOOT_CHUNK):
+    """Patient-level bootstrap of all metrics in every (domain, prompt) cell.
+
+    Each replicate draws patient multiplicities from Multinomial(n, 1/n) –
+    exactly a resample of n patients with replacement.  Returns
+    {metric: array (n_cells, iterations)}.
+    """
+    n_patients = indicators.shape[0]
+    out = {m: np.empty((averaging.shape[1], iterations)) for m in metric_funcs}
+    for start in range(0, iterations, chunk):
+        size    = min(chunk, iterations - start)
+        weights = rng.multinomial(n_patients, np.full(n_patients, 1 / n_patients),
+                                  size=size).astype(float)
+        for m, vals in metrics_from_counts(weights @ indicators, averaging).items():
+            out[m][:, start:start + size] = vals.T
+    return out
+
+##############################################################################
+# 1 ─── Parallel bootstrap execution ────────────────────────────────────────
+##############################################################################
+# Replicates are split into fixed chunks of BOOT_CHUNK.  Chunk k always draws
+# from the k-th SeedSequence child of RANDOM_STATE, so the replicates do not
+# depend on how many processes the chunks are spread over.
+_worker_state = {}
+
+def _init_worker(indicators, averaging):
+    # ship the (large) indicator matrix once per process, not once per chunk
+    _worker_state["indicators"] = indicators
+    _worker_state["averaging"]  = averaging
+
+def chunk_seeds(first, count, seed=RANDOM_STATE):
+    # the k-th child of SeedSequence(seed), without spawning the k before it
+    return [np.random.SeedSequence(seed, spawn_key=(k,))
+            for k in range(first, first + count)]
+
+def _bootstrap_chunk(size, seed, groups=None, cells=None):
+    rng = np.random.default_rng(seed)
+    indicators = _worker_state["indicators"]
+    averaging  = _worker_state["averaging"]
+    if cells is not None:
+        # only the columns of *groups*, which feed *cells* (--adaptive); the
+        # multiplicities are drawn exactly as for all cells
+        n_groups   = averaging.shape[0]
+        indicators = indicators[:, (np.arange(len(OUTCOMES))[:, None] * n_groups
+                                    + groups).ravel()]
+        averaging  = averaging[np.ix_(groups, cells)]
+    return bootstrap_metrics(indicators, averaging, size, rng, chunk=size)
+
+def _count_chunk(size, seed):
+    # the multiplicities of _bootstrap_chunk, but raw counts instead of metrics
+    rng        = np.random.default_rng(seed)
+    indicators = _worker_state["indicators"]
+    n_patients = indicators.shape[0]
+    weights    = rng.multinomial(n_patients, np.full(n_patients, 1 / n_patients),
+                                 size=size).astype(float)
+    return weights @ indicators
+
+def iter_bootstrap(indicators, averaging, iterations,
+                   seed=RANDOM_STATE, workers=1, chunk=BOOT_CHUNK,
+                   task=_bootstrap_chunk):
+    """Yield bootstrap_metrics() chunk by chunk, in chunk order, over *workers*
+    processes.  At most 2 · workers chunks are in flight, so memory stays
+    bounded however many replicates are drawn.  task=_count_chunk yields the
+    replicate counts of every indicator column instead."""
+    sizes = [min(chunk, iterations - start) for start in range(0, iterations, chunk)]
+    seeds = chunk_seeds(0, len(sizes), seed)
+
+    if workers <= 1:
+        _init_worker(indicators, averaging)
+        for size, s in zip(sizes, seeds):
+            yield task(size, s)
+        return
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(indicators, averaging)) as pool:
+        pending = deque()
+        for size, s in zip(sizes, seeds):
+            pending.append(pool.submit(task, size, s))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def parallel_bootstrap(indicators, averaging, iterations,
+                       seed=RANDOM_STATE, workers=1, chunk=BOOT_CHUNK):
+    """bootstrap_metrics() over *workers* processes, bit-identical for any
+    worker count.  Returns {metric: array (n_cells, iterations)}."""
+    out   = {m: np.empty((averaging.shape[1], iterations)) for m in metric_funcs}
+    start = 0
+    for part in iter_bootstrap(indicators, averaging, iterations, seed, workers, chunk):
+        size = part[next(iter(metric_funcs))].shape[1]
+        for m, vals in part.items():
+            out[m][:, start:start + size] = vals
+        start += size
+    return out
+
+##############################################################################
+# 1 ─── Streaming accumulation ──────────────────────────────────────────────
+##############################################################################
+# With --streaming the replicates are folded into fixed-size state as the
+# chunks arrive and then dropped, instead of being kept as a
+# cells × iterations matrix per metric.
+class QuantileSketch:
+    """Histogram of metric values in [0, 1] with *bins* bins per cell.
+
+    Memory is n_cells · bins counts whatever the number of replicates, and
+    sketches of disjoint replicate sets can be merged by adding `counts`.
+    """
+
+    def __init__(self, n_cells, bins=SKETCH_BINS):
+        self.bins   = bins
+        self.counts = np.zeros((n_cells, bins), dtype=np.int32)
+
+    def update(self, vals, cells=None):
+        """Add replicates shaped (n_cells, size), or (len(cells), size) for
+        the given *cells* only."""
+        n_cells = self.counts.shape[0]
+        rows = np.arange(n_cells) if cells is None else np.asarray(cells)
+        b    = np.minimum((vals * self.bins).astype(np.int64), self.bins - 1)
+        flat = (rows[:, None] * self.bins + b).ravel()
+        self.counts += np.bincount(flat, minlength=self.counts.size).reshape(n_cells, -1)
+
+    def _value_at(self, cum, rank):
+        # the rank-th smallest replicate (integer rank per cell), taking the
+        # values inside a bin to be spread evenly across it
+        rows  = np.arange(len(rank))
+        b     = (cum <= rank[:, None]).sum(axis=1)          # bin holding it
+        below = np.where(b > 0, cum[rows, b - 1], 0)
+        return (b + (rank - below + 0.5) / self.counts[rows, b]) / self.bins
+
+    def quantile(self, q):
+        """Per-cell q-quantile, interpolated like pandas' default 'linear'
+        method."""
+        cum  = self.counts.cumsum(axis=1)
+        rank = q * (cum[:, -1] - 1)                         # 0-based position
+        low  = np.floor(rank).astype(np.int64)
+        high = np.minimum(low + 1, cum[:, -1] - 1)
+        frac = rank - low
+        return ((1 - frac) * self._value_at(cum, low)
+                + frac * self._value_at(cum, high))
+
+    def quantile_error(self, q):
+        """Monte-Carlo standard error of quantile(q) per cell, read off the
+        sketch as half the distance between the quantiles one binomial SE of
+        the rank either side of q – no density estimate needed."""
+        n  = self.counts.sum(axis=1)
+        se = np.sqrt(q * (1 - q) / np.maximum(n, 1))
+        return (self.quantile(np.minimum(q + se, 1))
+                - self.quantile(np.maximum(q - se, 0))) / 2
+
+class SignCounter:
+    """Running counts of replicates with vals[a] - vals[b] <= 0 and >= 0 for
+    the cell pairs (a, b) – all the two-sided bootstrap p-value needs."""
+
+    def __init__(self, a, b):
+        self.a, self.b = np.asarray(a, int), np.asarray(b, int)
+        self.le = np.zeros(len(self.a), dtype=np.int64)
+        self.ge = np.zeros(len(self.a), dtype=np.int64)
+        self.n  = np.zeros(len(self.a), dtype=np.int64)    # replicates per pair
+
+    def update(self, vals, cells=None):
+        """Add replicates shaped (n_cells, size).  With *cells* (sorted) the
+        rows of vals are those cells only, and pairs with a cell outside them
+        are left as they are."""
+        rows, a, b = slice(None), self.a, self.b
+        if cells is not None:
+            cells = np.asarray(cells)
+            a = np.searchsorted(cells, self.a).clip(max=len(cells) - 1)
+            b = np.searchsorted(cells, self.b).clip(max=len(cells) - 1)
+            rows = (cells[a] == self.a) & (cells[b] == self.b)
+            a, b = a[rows], b[rows]
+        diff           = vals[a] - vals[b]
+        self.le[rows] += (diff <= 0).sum(axis=1)
+        self.ge[rows] += (diff >= 0).sum(axis=1)
+        self.n[rows]  += vals.shape[1]
+
+    def pvalues(self):
+        # tied replicates count in both tails, so the doubled share can pass 1
+        return np.minimum(1.0, 2 * np.minimum(self.le / self.n, self.ge / self.n))
+
+    def pvalue_errors(self):
+        """Monte-Carlo standard error of pvalues() (binomial SE of the
+        smaller tail share, doubled)."""
+        tail = np.minimum(self.le, self.ge) / np.maximum(self.n, 1)
+        return 2 * np.sqrt(tail * (1 - tail) / np.maximum(self.n, 1))
+
 ##############################################################################
 # 1 ─── Load ground truth ────────────────────────────────────────────────────
 ##############################################################################
-gt = pd.read_csv(GT_FILE)                    # expected columns: id, Addiction, Anxiety, …
-gt = gt.set_index("id")                      # index by patient_id for quick joins
+def load_ground_truth(gt_file=GT_FILE):
+    gt = pd.read_csv(gt_file)                # expected columns: id, Addiction, Anxiety, …
+    gt = gt.set_index("id")                  # index by patient_id for quick joins
 
-# ------------------------------------------------------
-print("── duplicate-row / duplicate-column check ──")
+    # ------------------------------------------------------
+    print("── duplicate-row / duplicate-column check ──")
 
-# a) duplicate patient-ID rows
-dupe_ids = gt.index[gt.index.duplicated()].unique()
-print("duplicate ids:", dupe_ids[:5], "… total =", len(dupe_ids))
+    # a) duplicate patient-ID rows
+    dupe_ids = gt.index[gt.index.duplicated()].unique()
+    print("duplicate ids:", dupe_ids[:5], "… total =", len(dupe_ids))
 
-# b) duplicate columns (same domain header twice)
-dupe_cols = gt.columns[gt.columns.duplicated()].unique()
-print("duplicate columns:", dupe_cols)
+    # b) duplicate columns (same domain header twice)
+    dupe_cols = gt.columns[gt.columns.duplicated()].unique()
+    print("duplicate columns:", dupe_cols)
 
-# c) duplicate (id, domain) pairs after melting
-gt_long_tmp = (
-    gt.reset_index()
-      .melt(id_vars="id", var_name="domain", value_name="y_true")
-)
-dupe_pairs = gt_long_tmp[gt_long_tmp.duplicated(["id", "domain"], keep=False)]
-print("duplicate (id, domain) pairs:", len(dupe_pairs))
-print(dupe_pairs.head())
-print("────────────────────────────────────────────")
-# ------------------------------------------------------
+    # c) duplicate (id, domain) pairs after melting
+    gt_long_tmp = (
+        gt.reset_index()
+          .melt(id_vars="id", var_name="domain", value_name="y_true")
+    )
+    dupe_pairs = gt_long_tmp[gt_long_tmp.duplicated(["id", "domain"], keep=False)]
+    print("duplicate (id, domain) pairs:", len(dupe_pairs))
+    print(dupe_pairs.head())
+    print("────────────────────────────────────────────")
+    # ------------------------------------------------------
+    return gt
 
 ##############################################################################
 # 2 ─── Read every run/domain CSV and build one tidy DataFrame ──────────────
 ##############################################################################
-records = []
-
-for run_path in RUN_FOLDERS:
-    run_name = run_path.name                 # e.g. "run1"
-    
-    for csv in run_path.glob("*.csv"):
-        # infer the domain name from the file, e.g. “…_Addiction.csv” → "Addiction"
-        # 1.   extract domain robustly
-        match   = re.search(r"prompts\d+-\d+_(.+?)\.csv$", csv.name)
-        domain  = match.group(1) if match else None
-        
-        df = pd.read_csv(csv)
-        df = df.set_index("id")              # patient id column
-        
-        # keep only the columns that are pure boolean prompts (drop reasoning)
-        prompt_cols = [c for c in df.columns if PROMPT_RE.match(c)]
-        df = df[prompt_cols]
-
-        # reshape: id × prompt → long format
-        df_long = (
-            df
-            .reset_index()
-            .melt(id_vars="id", var_name="prompt", value_name="y_pred")
-            .assign(run=run_name, domain=domain)
-        )
-        records.append(df_long)
+def read_prediction_csv(csv):
+    """One run/domain CSV → long table id · prompt · y_pred · run · domain."""
+    run_name = csv.parent.name               # e.g. "run1"
+
+    # infer the domain name from the file, e.g. “…_Addiction.csv” → "Addiction"
+    # 1.   extract domain robustly
+    match   = re.search(r"prompts\d+-\d+_(.+?)\.csv$", csv.name)
+    domain  = match.group(1) if match else None
+
+    # keep only the columns that are pure boolean prompts – the reasoning
+    # text is skipped at parse time.  The header is read from the same open
+    # file (one open per CSV on the share); pyarrow takes no callable usecols
+    with open(csv, "rb") as fh:
+        header      = pd.read_csv(fh, nrows=0).columns
+        prompt_cols = [c for c in header if PROMPT_RE.match(c)]
+        fh.seek(0)
+        df = pd.read_csv(fh, usecols=["id", *prompt_cols], engine=CSV_ENGINE)
+    df = df.set_index("id")[prompt_cols]     # patient id column; file column order
+
+    # reshape: id × prompt → long format
+    return (
+        df
+        .reset_index()
+        .melt(id_vars="id", var_name="prompt", value_name="y_pred")
+        .assign(run=run_name, domain=domain)
+    )
+
+def prediction_csvs(run_folders=RUN_FOLDERS):
+    return [csv for run_path in run_folders for csv in run_path.glob("*.csv")]
 
-# stack all runs → one master DF
-pred = pd.concat(records, ignore_index=True)
+def read_prediction_csvs(csvs, workers=READ_WORKERS):
+    """read_prediction_csv() over a thread pool, results in the order of *csvs*.
+    Reading is I/O-bound (ROOT is a network share), so threads suffice."""
+    if workers <= 1 or len(csvs) <= 1:
+        return [read_prediction_csv(csv) for csv in csvs]
+    with ThreadPoolExecutor(min(workers, len(csvs))) as pool:
+        return list(pool.map(read_prediction_csv, csvs))
+
+def load_predictions(run_folders=RUN_FOLDERS, workers=READ_WORKERS):
+    records = read_prediction_csvs(prediction_csvs(run_folders), workers)
+
+    # stack all runs → one master DF
+    return pd.concat(records, ignore_index=True)
 
 ##############################################################################
 # 3 ─── Merge ground truth & verify alignment ────────────────────────────────
 ##############################################################################
-# ❶ reshape GT: id × domain → long
-gt_long = (
-    gt.reset_index()                                # id back to column
-      .melt(id_vars="id",
-            var_name="domain",
-            value_name="y_true")                    # id · domain · y_true
-)
+def merge_ground_truth(pred, gt):
+    # ❶ reshape GT: id × domain → long
+    gt_long = (
+        gt.reset_index()                            # id back to column
+          .melt(id_vars="id",
+                var_name="domain",
+                value_name="y_true")                # id · domain · y_true
+    )
+
+    # ❷ join on *both* keys
+    pred = (
+        pred
+          .merge(gt_long, on=["id", "domain"], how="left", validate="many_to_one")
+    )
+
+    missing = pred[pred["y_true"].isna()]
 
-# ❷ join on *both* keys
-pred = (
-    pred
-      .merge(gt_long, on=["id", "domain"], how="left", validate="many_to_one")
-)
+    if not missing.empty:
+        print("First few missing rows:")
+        print(missing.head())
+        print("\nCount by domain:")
+        print(missing["domain"].value_counts().to_frame("n_missing"))
 
-missing = pred[pred["y_true"].isna()]
+    assert pred["y_true"].notna().all(), "Some (id, domain) pairs missing in GT!"
+    return pred
 
-if not missing.empty:
-    print("First few missing rows:")
-    print(missing.head())
-    print("\nCount by domain:")
-    print(missing["domain"].value_counts().to_frame("n_missing"))
+##############################################################################
+# 3 ─── Cached columnar ingestion ───────────────────────────────────────────
+##############################################################################
+# The tidy, GT-joined table is cached as Parquet next to the data, with a
+# `source` column naming the CSV each row came from.  A JSON manifest keeps
+# the mtime and size of every CSV and of the GT file; only CSVs whose entry
+# changed are parsed again, and a changed GT file invalidates everything.
+CACHE_FILE    = ".predictions_cache.parquet"
+MANIFEST_FILE = ".predictions_cache.json"
+CATEGORICAL   = ["domain", "prompt", "run", "source"]
+CACHE_VERSION = 2                              # 1 stored blank labels as True
+
+def file_signature(path):
+    stat = path.stat()
+    return [stat.st_mtime_ns, stat.st_size]
+
+def compact_predictions(pred):
+    """Categorical key columns and int8 labels instead of object strings."""
+    return pred.astype({c: "category" for c in CATEGORICAL}).assign(
+        y_pred=binary_labels(pred, "y_pred").astype("int8"),
+        y_true=binary_labels(pred, "y_true").astype("int8"),
+    )
 
-assert pred["y_true"].notna().all(), "Some (id, domain) pairs missing in GT!"
+def load_cached_predictions(root, gt, gt_file, workers=READ_WORKERS):
+    """GT-joined predictions of every run*/ CSV under *root*, via the cache."""
+    csvs     = prediction_csvs(sorted(root.glob("run*")))
+    sources  = [csv.relative_to(root).as_posix() for csv in csvs]
+    manifest = {
+        "version": CACHE_VERSION,
+        "gt":    file_signature(gt_file),
+        "files": {src: file_signature(csv) for src, csv in zip(sources, csvs)},
+    }
+    cache_path, manifest_path = root / CACHE_FILE, root / MANIFEST_FILE
+
+    old, cached = {"files": {}}, None
+    if cache_path.exists() and manifest_path.exists():
+        old = json.loads(manifest_path.read_text())
+        if old.get("version") == CACHE_VERSION and old.get("gt") == manifest["gt"]:
+            cached = dict(tuple(pd.read_parquet(cache_path)
+                                .groupby("source", observed=True, sort=False)))
+
+    stale = [
+        (src, csv) for src, csv in zip(sources, csvs)
+        if cached is None or src not in cached
+        or old["files"].get(src) != manifest["files"][src]
+    ]
+    fresh = dict(zip(
+        [src for src, _ in stale],
+        read_prediction_csvs([csv for _, csv in stale], workers),
+    ))
+
+    pieces = [                                   # keep the file order of a fresh load
+        merge_ground_truth(fresh[src].assign(source=src), gt) if src in fresh else cached[src]
+        for src in sources
+    ]
+    pred = compact_predictions(pd.concat(pieces, ignore_index=True))
+    print(f"predictions: parsed {len(fresh)} of {len(csvs)} CSVs, "
+          f"{len(csvs) - len(fresh)} from {cache_path.name}")
+
+    if manifest != old:
+        tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+        pred.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, cache_path)
+        manifest_path.write_text(json.dumps(manifest, indent=1))
+    return pred
 
 ##############################################################################
 # 4 ─── Point estimates per (domain, prompt, metric) averaged over runs ────
 ##############################################################################
 group_cols = ["domain", "prompt", "run"]
 
-point_est = (
-    pred.groupby(group_cols)
-        [["y_true", "y_pred"]]
-        .apply(lambda g: {
-            m: f(g.y_true, g.y_pred) for m, f in metric_funcs.items()
-        })
-        .apply(pd.Series)
-        .groupby(["domain", "prompt"])       # collapse the three runs
-        .mean()
-)
+def point_estimates(indicators, averaging, cells):
+    return pd.DataFrame(
+        metrics_from_counts(indicators.sum(axis=0), averaging),   # every patient once
+        index=cells,                                              # collapse the runs
+    )
 
 ##############################################################################
 # 5 ─── Patient-level bootstrap CIs ─────────────────────────────────────────
 ##############################################################################
-rng = np.random.default_rng(RANDOM_STATE)
-patients = pred["id"].unique()
-boot_results = {m: [] for m in metric_funcs}
-
-for _ in range(BOOT_ITERATIONS):
-    sample_ids = rng.choice(patients, size=len(patients), replace=True)
-    boot = pred[pred["id"].isin(sample_ids)]
-
-    # metric → DataFrame (domain, prompt) index
-    for m, func in metric_funcs.items():
-        vals = (
-            boot.groupby(group_cols)
-                [["y_true", "y_pred"]]
-                .apply(lambda g: func(g.y_true, g.y_pred))
-                .groupby(["domain", "prompt"])
-                .mean()                    # average three runs
-        )
-        boot_results[m].append(vals)
+def bootstrap_cis(indicators, averaging, cells, counters,
+                  iterations=BOOT_ITERATIONS, workers=1, streaming=False):
+    """CI limits per metric; every replicate is also fed to the SignCounters
+    in *counters* ({metric: [SignCounter, …]}).
+
+    streaming=True keeps a QuantileSketch per metric instead of every replicate.
+    """
+    limits = {}
+    if streaming:
+        sketches = {m: QuantileSketch(len(cells)) for m in metric_funcs}
+        for part in iter_bootstrap(indicators, averaging, iterations, workers=workers):
+            for m, vals in part.items():
+                sketches[m].update(vals)
+                for counter in counters[m]:
+                    counter.update(vals)
+        for m, sketch in sketches.items():
+            limits[m] = (sketch.quantile(0.025), sketch.quantile(0.975))
+    else:
+        # metric → (domain, prompt) × iterations matrix of run-averaged replicates
+        boot_results = parallel_bootstrap(indicators, averaging, iterations,
+                                          workers=workers)
+        limits = replicate_limits(boot_results, cells, counters)
+
+    return ci_table(limits, cells)
+
+def replicate_limits(boot_results, cells, counters):
+    """Exact CI limits from all replicates; also feeds the SignCounters."""
+    limits = {}
+    for m, vals in boot_results.items():
+        for counter in counters[m]:
+            counter.update(vals)
+        # rows: (domain, prompt)  ·  cols: replicates
+        mat = pd.DataFrame(vals, index=cells)
+        limits[m] = (mat.quantile(0.025, axis=1),  # 2.5 % quantile,  keeps index
+                     mat.quantile(0.975, axis=1))  # 97.5 % quantile
+    return limits
+
+def ci_table(limits, cells, boot_n=None):
+    ci_frames = {}
+    for m, (low, high) in limits.items():
+        ci = pd.DataFrame({"ci_low": low, "ci_high": high}, index=cells)
+        if boot_n is not None:
+            ci["boot_n"] = boot_n                     # replicates behind this cell
+        ci.index.names = ["domain", "prompt"]         # make sure names are set
+        ci_frames[m] = ci
+    return ci_frames
 
-# convert lists → (domain, prompt) × BOOT_ITERATIONS matrices
-ci_frames = {}
-for m, lst in boot_results.items():
-    mat = pd.concat(lst, axis=1)     # rows: (domain, prompt)  ·  cols: replicates
+##############################################################################
+# 5 ─── Incremental bootstrap from stored replicate counts ──────────────────
+##############################################################################
+# A replicate is a vector of patient multiplicities drawn from a fixed seed,
+# so the bootstrap counts of one (domain, prompt, run) group do not depend on
+# any other group.  --incremental keeps them in STORE_FILE – per group, the
+# four confusion counts of every replicate plus a fingerprint of the group's
+# predictions – and on the next run draws replicates only for the groups
+# that are new or whose predictions changed (a new run*/ folder, a new
+# domain CSV).  Run averages, CIs and p-values are then recomputed from the
+# counts, which is cheap.  The store is tied to the patients, --iterations
+# and RANDOM_STATE and is rebuilt when any of them changes.
+STORE_FILE = ".bootstrap_store.npz"
+
+def group_fingerprints(indicators, n_groups):
+    cols = indicators.reshape(len(indicators), len(OUTCOMES), n_groups)
+    return [hashlib.sha1(np.ascontiguousarray(cols[:, :, g]).tobytes()).hexdigest()
+            for g in range(n_groups)]
+
+def load_store(path, iterations, seed=RANDOM_STATE):
+    """(patients, {group: (fingerprint, counts (iterations, 4))}) from *path*,
+    or (None, {}) if there is none for this --iterations and seed."""
+    if not path.exists():
+        return None, {}
+    with np.load(path, allow_pickle=False) as store:
+        if store["iterations"] != iterations or store["seed"] != seed:
+            print(f"{path.name}: made for another bootstrap – rebuilt")
+            return None, {}
+        counts = store["counts"]
+        groups = [tuple(key) for key in store["groups"]]
+        return store["patients"], {
+            key: (fp, counts[:, :, g])
+            for g, (key, fp) in enumerate(zip(groups, store["fingerprints"]))
+        }
+
+def save_store(path, patients, iterations, groups, fingerprints, counts,
+               seed=RANDOM_STATE):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as fh:
+        np.savez(fh, patients=patients, iterations=iterations, seed=seed,
+                 groups=np.array([list(map(str, key)) for key in groups]),
+                 fingerprints=np.array(fingerprints), counts=counts)
+    os.replace(tmp_path, path)
+
+def incremental_bootstrap(pred, indicators, averaging, groups, cells, counters,
+                          root, iterations=BOOT_ITERATIONS, workers=1):
+    """bootstrap_cis() with the replicate counts of unchanged groups taken
+    from root / STORE_FILE.  Same result as a full run on the same patients."""
+    n_groups = len(groups)
+    patients = np.asarray(pd.factorize(pred["id"])[1], dtype=str)   # indicator rows
+    stored_patients, stored = load_store(root / STORE_FILE, iterations)
+    if stored_patients is not None and set(stored_patients) == set(patients):
+        # replicates weight patients in the stored order – keep it
+        indicators = indicators[pd.Index(patients).get_indexer(stored_patients)]
+        patients   = stored_patients
+    elif stored:
+        print(f"{STORE_FILE}: the patients changed – every replicate is drawn again")
+        stored = {}
+
+    fingerprints = group_fingerprints(indicators, n_groups)
+    keys   = [tuple(map(str, key)) for key in groups]
+    reused = [g for g, key in enumerate(keys)
+              if key in stored and stored[key][0] == fingerprints[g]]
+    fresh  = np.setdiff1d(np.arange(n_groups), reused)
+
+    dtype  = np.uint16 if len(patients) < 2**16 else np.uint32
+    counts = np.empty((iterations, len(OUTCOMES), n_groups), dtype)
+    for g in reused:
+        counts[:, :, g] = stored[keys[g]][1]
+    if len(fresh):
+        cols  = (np.arange(len(OUTCOMES))[:, None] * n_groups + fresh).ravel()
+        drawn = np.concatenate(list(iter_bootstrap(indicators[:, cols], None, iterations,
+                                                   workers=workers, task=_count_chunk)))
+        counts[:, :, fresh] = drawn.reshape(iterations, len(OUTCOMES), len(fresh))
+    print(f"{STORE_FILE}: {len(reused)} of {n_groups} groups reused, "
+          f"{len(fresh)} bootstrapped")
+    if len(fresh) or len(stored) != n_groups:
+        save_store(root / STORE_FILE, patients, iterations, keys, fingerprints, counts)
+
+    # metrics chunk by chunk, exactly as bootstrap_metrics computes them
+    flat = counts.reshape(iterations, -1)
+    boot_results = {m: np.empty((len(cells), iterations)) for m in metric_funcs}
+    for start in range(0, iterations, BOOT_CHUNK):
+        part = metrics_from_counts(flat[start:start + BOOT_CHUNK].astype(float), averaging)
+        for m, vals in part.items():
+            boot_results[m][:, start:start + BOOT_CHUNK] = vals.T
+    return ci_table(replicate_limits(boot_results, cells, counters), cells)
 
-    ci = pd.DataFrame({
-        "ci_low":  mat.quantile(0.025, axis=1),   # 2.5 % quantile,  keeps index
-        "ci_high": mat.quantile(0.975, axis=1)    # 97.5 % quantile
-    })
-    ci.index.names = ["domain", "prompt"]         # make sure names are set
-    ci_frames[m] = ci
+##############################################################################
+# 5 ─── Sequential (adaptive) bootstrap ─────────────────────────────────────
+##############################################################################
+# A fixed B wastes replicates on clear-cut cells and is too small for
+# near-ties.  --adaptive draws *iterations* replicates, then adds rounds of
+# *batch* replicates to those cells whose CI limits or p-values still have a
+# Monte-Carlo standard error above *tolerance* (relative above alpha), until none is left or a cell
+# reaches *max_iterations*.  Round r reuses chunk seeds, so a cell's
+# replicates are always the first boot_n replicates of the fixed-B run, and
+# a pair's p-value is only updated while both of its cells are drawn.
+def unconverged_cells(sketches, counters, n_cells, tolerance):
+    """Boolean mask of the cells still above *tolerance*: a CI limit of any
+    metric, or a p-value of any comparison they take part in.  A p-value
+    above alpha only has to be known to tolerance · p / alpha – whether it
+    is 0.6 or 0.61 changes no conclusion, but pinning it down would take
+    ~1/tolerance² replicates."""
+    open_ = np.zeros(n_cells, bool)
+    for sketch in sketches.values():
+        open_ |= sketch.quantile_error(0.025) > tolerance
+        open_ |= sketch.quantile_error(0.975) > tolerance
+    for counter in (c for cs in counters.values() for c in cs):
+        bad = counter.pvalue_errors() > tolerance * np.maximum(1, counter.pvalues() / alpha)
+        open_[counter.a[bad]] = True
+        open_[counter.b[bad]] = True
+    return open_
+
+def adaptive_bootstrap(indicators, averaging, cells, counters,
+                       tolerance=MC_TOLERANCE, iterations=BOOT_ITERATIONS,
+                       batch=BOOT_BATCH, max_iterations=BOOT_MAX_ITERATIONS,
+                       workers=1, seed=RANDOM_STATE):
+    """bootstrap_cis() with a replicate count per cell (see above).
+
+    Replicates are kept in QuantileSketches, as with --streaming.  The CI
+    frames carry a boot_n column with the replicates drawn per cell.
+    """
+    n_cells    = len(cells)
+    group_cell = averaging.argmax(axis=1)           # cell of every (…, run) group
+    sketches   = {m: QuantileSketch(n_cells) for m in metric_funcs}
+    boot_n     = np.zeros(n_cells, dtype=np.int64)
+    active     = np.arange(n_cells)
+    drawn      = 0                                  # replicates of the active cells
+    pool = (ProcessPoolExecutor(workers, initializer=_init_worker,
+                                initargs=(indicators, averaging))
+            if workers > 1 else nullcontext())
+    with pool:
+        if workers <= 1:
+            _init_worker(indicators, averaging)
+        while len(active) and drawn < max_iterations:
+            size  = min(iterations if drawn == 0 else batch, max_iterations - drawn)
+            first = drawn // BOOT_CHUNK              # chunk k ↔ replicates k·BOOT_CHUNK…
+            sizes = [min(BOOT_CHUNK, size - start) for start in range(0, size, BOOT_CHUNK)]
+            tasks = [(n, s, np.flatnonzero(np.isin(group_cell, active)), active)
+                     for n, s in zip(sizes, chunk_seeds(first, len(sizes), seed))]
+            parts = (map(lambda t: _bootstrap_chunk(*t), tasks) if workers <= 1 else
+                     [f.result() for f in [pool.submit(_bootstrap_chunk, *t) for t in tasks]])
+            for part in parts:
+                for m, vals in part.items():
+                    sketches[m].update(vals, active)
+                    for counter in counters[m]:
+                        counter.update(vals, active)
+            boot_n[active] += size
+            drawn          += size
+
+            still  = unconverged_cells(sketches, counters, n_cells, tolerance)
+            active = np.flatnonzero(still & (boot_n >= drawn))   # frozen cells stay frozen
+            print(f"  {drawn:>6} replicates: {len(active)} of {n_cells} cells "
+                  f"above MC error {tolerance}")
+
+    if len(active):
+        print(f"⚠ {len(active)} cells reached --max-iterations {max_iterations} "
+              f"above the tolerance")
+    limits = {m: (sk.quantile(0.025), sk.quantile(0.975)) for m, sk in sketches.items()}
+    return ci_table(limits, cells, boot_n)
 
 ##############################################################################
 # 8 ─── p-values: best vs worst prompt per domain & metric ───────────────────
 ##############################################################################
-# We reuse:
-#   point_est[m]     — Series indexed by (domain, prompt) with mean metric
-#   boot_results[m]  — list of length BOOT_ITERATIONS,
-#                      each is a Series with same index
-
-pval_frames = []
-
-for m, boot_list in boot_results.items():
-    # ❶ locate the best and worst prompt *by point estimate* (averaged over runs)
-    #    — one winner and loser for each domain
-    best_idx = point_est[m].groupby("domain").idxmax()   # e.g. ('Anxiety','Prompt 3')
-    worst_idx = point_est[m].groupby("domain").idxmin()
-
-    # ❷ stack bootstrap replicates into a DataFrame
-    mat = pd.concat(boot_list, axis=1)   # index: (domain, prompt) ; columns: replicates
-
-    rows = []
-    for dom in best_idx.index:           # iterate over domains
-        idx_best  = best_idx[dom]              # ('Anxiety','Prompt 3'), …
-        idx_worst = worst_idx[dom]
-        idx_p1    = (dom, "Prompt 1")
-        idx_p7    = (dom, "Prompt 7")
-
-        # ---------- best  vs  worst ----------------------------------------
-        diff_bw = mat.loc[idx_best] - mat.loc[idx_worst]
-        p_bw = 2 * min((diff_bw <= 0).mean(), (diff_bw >= 0).mean())
-
-        # ---------- best  vs  Prompt x ------------------------------------
-        if idx_p1 in mat.index and idx_best != idx_p1:
-            diff_p1 = mat.loc[idx_best] - mat.loc[idx_p1]
-            p_b1 = 2 * min((diff_p1 <= 0).mean(), (diff_p1 >= 0).mean())
-        else:                                # P1 absent *or* already best
-            p_b1 = np.nan                    # keep table shape
-
-        rows.append({
+def select_comparisons(point_est, cells):
+    """Best, worst and Prompt 1 cell of every domain, per metric.
+
+    Returns {metric: DataFrame domain · best_prompt · worst_prompt · best ·
+    worst · prompt1}, the last three being row positions in *cells*;
+    prompt1 is -1 when Prompt 1 is absent *or* already the best.
+    """
+    comparisons = {}
+    for m in metric_funcs:
+        # ❶ locate the best and worst prompt *by point estimate* (averaged over runs)
+        #    — one winner and loser for each domain
+        best_idx  = point_est[m].groupby("domain").idxmax()  # e.g. ('Anxiety','Prompt 3')
+        worst_idx = point_est[m].groupby("domain").idxmin()
+        p1_idx    = [(dom, "Prompt 1") for dom in best_idx.index]
+
+        c = pd.DataFrame({
+            "domain":       best_idx.index,
+            "best_prompt":  [idx[1] for idx in best_idx],
+            "worst_prompt": [idx[1] for idx in worst_idx],
+            "best":         cells.get_indexer(list(best_idx)),
+            "worst":        cells.get_indexer(list(worst_idx)),
+            "prompt1":      cells.get_indexer(p1_idx),
+        })
+        c.loc[c["prompt1"] == c["best"], "prompt1"] = -1
+        comparisons[m] = c
+    return comparisons
+
+def best_worst_counters(comparisons):
+    """{metric: (best vs worst, best vs Prompt 1)} SignCounters for bootstrap_cis."""
+    return {
+        m: (SignCounter(c["best"], c["worst"]),
+            SignCounter(c.loc[c["prompt1"] >= 0, "best"],
+                        c.loc[c["prompt1"] >= 0, "prompt1"]))
+        for m, c in comparisons.items()
+    }
+
+def best_worst_pvalues(comparisons, signs):
+    # We reuse:
+    #   comparisons[m]  — best / worst / Prompt 1 per domain (select_comparisons)
+    #   signs[m]        — best_worst_counters, filled by bootstrap_cis
+
+    pval_frames = []
+
+    for m, c in comparisons.items():
+        counts_bw, counts_b1 = signs[m]
+
+        # ---------- best  vs  Prompt 1 --------------------------------
+        p_b1 = np.full(len(c), np.nan)           # P1 absent *or* already best
+        p_b1[c["prompt1"].to_numpy() >= 0] = counts_b1.pvalues()
+
+        pval_frames.append(pd.DataFrame({
             "metric": m,
-            "domain": dom,
-            "best_prompt":   idx_best[1],
-            "worst_prompt":  idx_worst[1],
-            "p_best_vs_worst":        p_bw,
+            "domain": c["domain"],
+            "best_prompt":   c["best_prompt"],
+            "worst_prompt":  c["worst_prompt"],
+            "p_best_vs_worst":        counts_bw.pvalues(),
             "p_best_vs_prompt1":      p_b1,
-        })
+        }))
 
-    pval_frames.append(pd.DataFrame(rows))
+    pvals = pd.concat(pval_frames, ignore_index=True)
 
-pvals = pd.concat(pval_frames, ignore_index=True)
+    p_cols = ["p_best_vs_worst", "p_best_vs_prompt1"]
 
-p_cols = ["p_best_vs_worst", "p_best_vs_prompt1"]
+    for col in p_cols:
+        mask = pvals[col].notna()                       # skip NaNs
+        adj_p = multipletests(
+                    pvals.loc[mask, col], alpha=alpha,
+                    method="fdr_bh"                     # or "bonferroni"
+                )[1]
+        pvals.loc[mask, col] = adj_p
 
-for col in p_cols:
-    mask = pvals[col].notna()                       # skip NaNs
-    adj_p = multipletests(
-                pvals.loc[mask, col], alpha=alpha,
-                method="fdr_bh"                     # or "bonferroni"
-            )[1]
-    pvals.loc[mask, col] = adj_p
+    pvals["sig_bw"] = pvals["p_best_vs_worst"]   < alpha
+    pvals["sig_b1"] = pvals["p_best_vs_prompt1"] < alpha
+    return pvals
 
-pvals["sig_bw"] = pvals["p_best_vs_worst"]   < alpha
-pvals["sig_b1"] = pvals["p_best_vs_prompt1"] < alpha
+##############################################################################
+# 8 ─── All pairwise prompt comparisons per domain & metric ──────────────────
+##############################################################################
+def prompt_pairs(cells):
+    """Every unordered pair of prompts within a domain.
+
+    Returns DataFrame domain · prompt_a · prompt_b · a · b, with a and b the
+    row positions in *cells*.
+    """
+    domains = cells.get_level_values("domain")
+    prompts = cells.get_level_values("prompt")
+    a, b = [], []
+    for dom in domains.unique():
+        pos  = np.flatnonzero(domains == dom)
+        i, j = np.triu_indices(len(pos), k=1)
+        a.append(pos[i])
+        b.append(pos[j])
+    a, b = np.concatenate(a), np.concatenate(b)
+    return pd.DataFrame({
+        "domain": domains[a], "prompt_a": prompts[a], "prompt_b": prompts[b],
+        "a": a, "b": b,
+    })
+
+def pairwise_pvalues(pairs, point_est, signs):
+    """Point difference, two-sided bootstrap p-value and BH q-value of every
+    pair in *pairs*, for every metric.  *signs* holds one SignCounter per
+    metric over (pairs.a, pairs.b), filled by bootstrap_cis; all comparisons
+    go through a single multipletests call."""
+    out = pd.concat([
+        pairs[["domain", "prompt_a", "prompt_b"]].assign(
+            metric=m,
+            diff=point_est[m].to_numpy()[pairs["a"]] - point_est[m].to_numpy()[pairs["b"]],
+            p=signs[m].pvalues(),
+        )
+        for m in metric_funcs
+    ], ignore_index=True)
+
+    out["q"]   = multipletests(out["p"], alpha=alpha, method="fdr_bh")[1]
+    out["sig"] = out["q"] < alpha
+    return out.set_index(["metric", "domain", "prompt_a", "prompt_b"]).sort_index()
 
 ##############################################################################
 # 6 ─── Assemble final tidy table: point, ci_low, ci_high ───────────────────
 ##############################################################################
-outs = []
+def assemble_result(point_est, ci_frames, pvals):
+    outs = []
+
+    for m in metric_funcs:
+        # 1️⃣  point estimates – flatten *completely*
+        df_point = (
+            point_est[m]                       # Series indexed by (domain,prompt)
+            .rename("point")
+            .reset_index(drop=False)           # domain + prompt become columns
+        )
 
-for m in metric_funcs:
-    # 1️⃣  point estimates – flatten *completely*
-    df_point = (
-        point_est[m]                       # Series indexed by (domain,prompt)
-        .rename("point")
-        .reset_index(drop=False)           # domain + prompt become columns
-    )
+        # 2️⃣  CI limits – flatten *completely*
+        df_ci = (
+            ci_frames[m]                       # DataFrame, same MultiIndex
+            .reset_index(drop=False)           # -> columns domain, prompt, ci_low, ci_high
+        )
 
-    # 2️⃣  CI limits – flatten *completely*
-    df_ci = (
-        ci_frames[m]                       # DataFrame, same MultiIndex
-        .reset_index(drop=False)           # -> columns domain, prompt, ci_low, ci_high
-    )
+        # 3️⃣  explicit two-column merge (no index involved)
+        df = (
+            df_point
+              .merge(df_ci, on=["domain", "prompt"], how="left", validate="one_to_one")
+              .assign(metric=m)
+        )
+        outs.append(df)
 
-    # 3️⃣  explicit two-column merge (no index involved)
-    df = (
-        df_point
-          .merge(df_ci, on=["domain", "prompt"], how="left", validate="one_to_one")
-          .assign(metric=m)
+    return (
+        pd.concat(outs, ignore_index=True)
+          .merge(pvals, on=["metric", "domain"], how="left")
+          .set_index(["metric", "domain", "prompt"])
+          .sort_index()
     )
-    outs.append(df)
-
-result = (
-    pd.concat(outs, ignore_index=True)
-      .merge(pvals, on=["metric", "domain"], how="left")  
-      .set_index(["metric", "domain", "prompt"])
-      .sort_index()
-)
 
 ##############################################################################
 # 7 ─── Inspect / export ────────────────────────────────────────────────────
 ##############################################################################
-
-print(result)                   # or result.loc["balanced_accuracy"]
-
-# CSV for the manuscript:
-out_path = ROOT / f"bootstrap_metrics_by_prompt_B{BOOT_ITERATIONS}_pvals_vsBaseline.csv"
-out_path.parent.mkdir(parents=True, exist_ok=True)   # no error if already there
-result.to_csv(out_path, float_format="%.5f", index=True)
-print(f"✔ Saved: {out_path}")
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Bootstrap CIs and p-values of prompt performance per domain.")
+    parser.add_argument("--root", type=pathlib.Path, default=ROOT,
+                        help="Folder holding GT_eng.csv and the run*/ folders.")
+    parser.add_argument("--iterations", type=int, default=BOOT_ITERATIONS,
+                        help="Number of patient-level bootstrap replicates.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes sharing the bootstrap; results do not "
+                             "depend on this number.")
+    parser.add_argument("--read-workers", type=int, default=READ_WORKERS,
+                        help="Threads parsing the run/domain CSVs.")
+    parser.add_argument("--no-cache", action="store_true",
+                        help=f"Parse every CSV and neither read nor write {CACHE_FILE}.")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Fold replicates into fixed-size quantile sketches "
+                             "instead of keeping them all (bounded memory; CI "
+                             "limits to about 1/SKETCH_BINS).")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Start with --iterations replicates and add batches "
+                             "only where CI limits or p-values still have a "
+                             "Monte-Carlo SE above --tolerance (implies --streaming).")
+    parser.add_argument("--tolerance", type=float, default=MC_TOLERANCE,
+                        help="--adaptive: target Monte-Carlo SE of every CI limit and p-value.")
+    parser.add_argument("--batch", type=int, default=BOOT_BATCH,
+                        help="--adaptive: replicates added per round.")
+    parser.add_argument("--max-iterations", type=int, default=BOOT_MAX_ITERATIONS,
+                        help="--adaptive: hard cap on the replicates of a cell.")
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"Keep per-group replicate counts in {STORE_FILE} and "
+                             "bootstrap only new or changed (domain, prompt, run) groups.")
+    args = parser.parse_args()
+    if args.incremental and (args.adaptive or args.streaming):
+        parser.error("--incremental keeps every replicate; it cannot be combined "
+                     "with --adaptive or --streaming")
+    if args.adaptive and (args.iterations % BOOT_CHUNK or args.batch % BOOT_CHUNK):
+        parser.error(f"--adaptive needs --iterations and --batch in multiples of {BOOT_CHUNK}")
+    return args
+
+def main():
+    args = parse_args()
+
+    gt_file = args.root / GT_FILE.name
+    gt      = load_ground_truth(gt_file)
+    if args.no_cache:
+        pred = merge_ground_truth(
+            load_predictions(sorted(args.root.glob("run*")), args.read_workers), gt)
+    else:
+        pred = load_cached_predictions(args.root, gt, gt_file, args.read_workers)
+
+    indicators, averaging, groups, cells = encode_predictions(pred, group_cols)
+    point_est   = point_estimates(indicators, averaging, cells)
+    comparisons = select_comparisons(point_est, cells)
+    pairs       = prompt_pairs(cells)
+    bw_signs    = best_worst_counters(comparisons)
+    pair_signs  = {m: SignCounter(pairs["a"], pairs["b"]) for m in metric_funcs}
+
+    counters    = {m: [*bw_signs[m], pair_signs[m]] for m in metric_funcs}
+
+    if args.adaptive:
+        ci_frames = adaptive_bootstrap(indicators, averaging, cells, counters,
+                                       args.tolerance, args.iterations, args.batch,
+                                       args.max_iterations, args.workers)
+        tag = f"adaptive{args.tolerance:g}"
+    elif args.incremental:
+        ci_frames = incremental_bootstrap(pred, indicators, averaging, groups, cells,
+                                          counters, args.root, args.iterations,
+                                          args.workers)
+        tag = args.iterations
+    else:
+        ci_frames = bootstrap_cis(indicators, averaging, cells, counters,
+                                  args.iterations, args.workers, args.streaming)
+        tag = args.iterations
+    pvals    = best_worst_pvalues(comparisons, bw_signs)
+    pairwise = pairwise_pvalues(pairs, point_est, pair_signs)
+    result = assemble_result(point_est, ci_frames, pvals)
+
+    print(result)                   # or result.loc["balanced_accuracy"]
+
+    # CSV for the manuscript:
+    out_path = args.root / f"bootstrap_metrics_by_prompt_B{tag}_pvals_vsBaseline.csv"
+    out_path.parent.mkdir(parents=True, exist_ok=True)   # no error if already there
+    result.to_csv(out_path, float_format="%.5f", index=True)
+    print(f"✔ Saved: {out_path}")
+
+    pair_path = args.root / f"bootstrap_pairwise_by_prompt_B{tag}.csv"
+    pairwise.to_csv(pair_path, float_format="%.5f", index=True)
+    print(f"✔ Saved: {pair_path}")
+
+
+if __name__ == "__main__":          # required for --workers on Windows (spawn)
+    main()
@@ -0,0 +1,521 @@
+"""sweepprompts.py
+
+Run a whole prompt sweep – every prompt of the prompt table, for every
+domain, every report of the cohort and several runs – as one saturated batch
+against the LLM server, and write the results straight into the layout read
+by *statisticalanalysis.py*::
+
+    <output-root>/run<r>/prompts<a>-<b>_<Domain>.csv   (id, Prompt N, Prompt N Reasoning, …)
+
+A row labelled ``Prompt N`` in the prompt table keeps its number ``N``;
+other rows (noisy variants such as ``Prompt 3_scramble+capitalize_sigma0.5_seed0``)
+are numbered after the highest of them, and ``prompt_index.csv`` maps every
+number back to its table label.  All requests share one worker pool, scheduler and
+endpoint pool (see :func:`extractinformation.analyse_reports_async`), so the
+server stays busy across prompt, domain and run boundaries.  Identical calls
+– the same prompt text for the same report, domain and run – are sent once
+and their answer is written to every prompt column that asked for it.  Run
+``r`` is sent with sampling seed ``r``, which keeps the runs apart in the
+response cache and reproducible at a non-zero ``--temperature``.
+
+Usage
+-----
+$ python sweepprompts.py \
+    --prompts ClickBrick_Prompting_table_v2.csv \
+    --input clean_060624_LLM_Anamnese.xlsx \
+    --output-root predictions --runs 3 --concurrency 8 \
+    --domains Abhängigkeit Angst Depression
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import itertools
+import logging
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Sequence
+
+from dotenv import load_dotenv
+
+from extractinformation import (
+    CONDITIONS,
+    DEFAULT_CACHE_PATH,
+    DEFAULT_CACHE_SIZE_MB,
+    DEFAULT_MAX_RETRIES,
+    EndpointPool,
+    Extraction,
+    Job,
+    RequestScheduler,
+    ResponseCache,
+    TelemetryLog,
+    analyse_reports_async,
+    check_context_tokens,
+    check_unique_ids,
+    configure_openai,
+    iter_reports,
+    log_summary,
+)
+
+# ---------------------------------------------------------------------------
+# CONSTANTS ------------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+# Domain names used in the file names; they must match the GT_eng.csv headers
+DOMAIN_NAMES: Dict[str, str] = {
+    "Abhängigkeit": "Addiction",
+    "Angst": "Anxiety",
+    "Depression": "Depression",
+    "Eigengefährdung": "SelfEndangerment",
+    "Fremdaggressivität": "Aggression",
+    "Kognitive Störung": "CognitiveImpairment",
+    "Manie": "Mania",
+    "Positivsymptomatik": "PositiveSymptoms",
+    "Negativsymptomatik": "NegativeSymptoms",
+    "Schlaf": "Sleep",
+    "Selbstverletzung": "SelfHarm",
+    "Suizidalität": "Suicidality",
+}
+
+# Row label whose number becomes the "Prompt N" column as it is
+PROMPT_LABEL = re.compile(r"^Prompt (\d+)$")
+
+# ---------------------------------------------------------------------------
+# PROMPT TABLE ---------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+
+class SweepPrompt(NamedTuple):
+    """One row of the prompt table: its number, label and text cells."""
+
+    number: int
+    label: str
+    cells: Dict[str, str]
+
+
+class Domain(NamedTuple):
+    """A condition asked about and the name its result files carry."""
+
+    condition: str
+    name: str
+
+
+def read_prompt_table(path: Path) -> List[SweepPrompt]:
+    """Read the prompt table; the first column labels the rows.
+
+    A row labelled ``Prompt N`` is numbered N whatever its position, so that
+    filtering rows or interleaving noisy variants does not shift the prompt
+    columns.  Other rows are numbered after the highest N, in table order.
+    Raises ``ValueError`` if two rows carry the same number.
+    """
+    with path.open("r", newline="", encoding="utf-8") as handle:
+        reader = csv.reader(handle)
+        header = next(reader)
+        rows = [row for row in reader if row and row[0]]
+
+    labelled = [PROMPT_LABEL.match(row[0].strip()) for row in rows]
+    taken = Counter(int(match.group(1)) for match in labelled if match)
+    repeated = sorted(number for number, count in taken.items() if count > 1)
+    if repeated:
+        raise ValueError(
+            f"{path}: more than one row labelled "
+            + ", ".join(f"Prompt {number}" for number in repeated)
+        )
+    free = itertools.count(max(taken, default=0) + 1)
+    return [
+        SweepPrompt(
+            int(match.group(1)) if match else next(free),
+            row[0],
+            dict(zip(header[1:], row[1:])),
+        )
+        for match, row in zip(labelled, rows)
+    ]
+
+
+def prompt_text(prompt: SweepPrompt, domain: Domain) -> str:
+    """The question *prompt* asks about *domain*.
+
+    A column named after the condition or the domain holds a domain-specific
+    wording; otherwise the non-empty text cells are joined.  ``{condition}``
+    and ``{domain}`` placeholders are filled in.
+    """
+    for column in (domain.condition, domain.name):
+        if prompt.cells.get(column, "").strip():
+            text = prompt.cells[column]
+            break
+    else:
+        text = " ".join(cell for cell in prompt.cells.values() if cell.strip())
+    text = text.replace("{condition}", domain.condition).replace("{domain}", domain.name)
+    return text.rstrip() + " "
+
+
+def parse_domain(entry: str) -> Domain:
+    """``"Angst"`` or ``"Angst=Anxiety"`` → :class:`Domain`."""
+    condition, _, name = entry.partition("=")
+    if not name:
+        if condition not in DOMAIN_NAMES:
+            raise argparse.ArgumentTypeError(
+                f"no file name known for {condition!r}; write it as {condition}=<Name>"
+            )
+        name = DOMAIN_NAMES[condition]
+    return Domain(condition, name)
+
+
+# ---------------------------------------------------------------------------
+# OUTPUT LAYOUT --------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+
+class SweepWriter:
+    """Streams finished rows into ``run<r>/prompts<a>-<b>_<Domain>.csv``.
+
+    A row is written as soon as every prompt has been answered for its
+    report, domain and run; rows therefore appear in completion order.
+    """
+
+    def __init__(
+        self,
+        output_root: Path,
+        prompts: Sequence[SweepPrompt],
+        domains: Sequence[Domain],
+        runs: int,
+    ) -> None:
+        self.n_prompts = len(prompts)
+        self.pending: Dict[tuple[int, str, str], dict] = {}
+        self.rows = 0
+        self.failures = 0
+        header = ["id"]
+        for prompt in prompts:
+            header += [f"Prompt {prompt.number}", f"Prompt {prompt.number} Reasoning"]
+
+        self._handles = []
+        self._writers: Dict[tuple[int, str], csv.DictWriter] = {}
+        numbers = [prompt.number for prompt in prompts]
+        span = f"{min(numbers)}-{max(numbers)}"
+        for run in range(1, runs + 1):
+            folder = output_root / f"run{run}"
+            folder.mkdir(parents=True, exist_ok=True)
+            for domain in domains:
+                handle = (folder / f"prompts{span}_{domain.name}.csv").open(
+                    "w", newline="", encoding="utf-8"
+                )
+                writer = csv.DictWriter(handle, fieldnames=header)
+                writer.writeheader()
+                self._handles.append(handle)
+                self._writers[(run, domain.condition)] = writer
+
+    def add(
+        self,
+        run: int,
+        condition: str,
+        report_id: str,
+        numbers: Sequence[int],
+        result: Extraction,
+    ) -> None:
+        """Record *result* as the answer of every prompt in *numbers*."""
+        key = (run, condition, report_id)
+        row = self.pending.setdefault(key, {"id": report_id})
+        flag = result.flags.get(condition)
+        for number in numbers:
+            row[f"Prompt {number}"] = flag
+            row[f"Prompt {number} Reasoning"] = result.reasoning
+        self.failures += len(numbers) if flag is None else 0
+        if len(row) == 1 + 2 * self.n_prompts:
+            self._writers[(run, condition)].writerow(self.pending.pop(key))
+            self.rows += 1
+
+    def close(self) -> None:
+        for handle in self._handles:
+            handle.close()
+
+    def __enter__(self) -> "SweepWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def write_prompt_index(output_root: Path, prompts: Sequence[SweepPrompt]) -> None:
+    """Map the ``Prompt N`` columns back to the labels of the prompt table."""
+    with (output_root / "prompt_index.csv").open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["prompt", "label"])
+        writer.writerows([f"Prompt {p.number}", p.label] for p in prompts)
+
+
+# ---------------------------------------------------------------------------
+# SWEEP ----------------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+
+def sweep(
+    prompts_path: Path,
+    input_path: Path,
+    output_root: Path,
+    model: str,
+    *,
+    domains: Sequence[Domain],
+    runs: int = 3,
+    id_column: str = "id",
+    text_column: str = "report",
+    concurrency: int = 1,
+    report_first: bool = False,
+    cache: ResponseCache | None = None,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    tokens_per_minute: int | None = None,
+    stream: bool = False,
+    endpoints: Sequence[str] | None = None,
+    temperature: float = 0.0,
+    longest_first: bool = False,
+    context_tokens: int | None = None,
+) -> None:
+    """Answer every prompt × domain × report × run and write the run*/ layout.
+
+    The reports are streamed from *input_path* once per run; all requests
+    go through a single :func:`analyse_reports_async` call, which also
+    implements *longest_first* and the splitting of reports longer than
+    *context_tokens*.
+    """
+    prompts = read_prompt_table(prompts_path)
+    if not prompts:
+        raise ValueError(f"{prompts_path} contains no prompts")
+    # answers are matched to rows by (run, report id, …)
+    check_unique_ids(input_path, id_column, text_column)
+    if context_tokens is not None:
+        check_context_tokens(
+            [
+                ((domain.condition,), prompt_text(prompt, domain))
+                for domain in domains
+                for prompt in prompts
+            ],
+            context_tokens,
+        )
+    output_root.mkdir(parents=True, exist_ok=True)
+    write_prompt_index(output_root, prompts)
+
+    # (run, report id, condition, question) -> prompt numbers waiting for it
+    targets: Dict[tuple[int, str, str, str], List[int]] = {}
+    counts = {"calls": 0, "deduplicated": 0}
+
+    def jobs() -> Iterator[Job]:
+        # All calls about one report in one run are queued back to back; they
+        # are registered in *targets* before the first of them is yielded.
+        for run in range(1, runs + 1):
+            for report_id, report_text in iter_reports(input_path, id_column, text_column):
+                unique: List[tuple[str, str]] = []
+                for domain in domains:
+                    for prompt in prompts:
+                        question = prompt_text(prompt, domain)
+                        key = (run, report_id, domain.condition, question)
+                        if key in targets:
+                            targets[key].append(prompt.number)
+                            counts["deduplicated"] += 1
+                        else:
+                            targets[key] = [prompt.number]
+                            unique.append((domain.condition, question))
+                for condition, question in unique:
+                    counts["calls"] += 1
+                    yield Job(report_text, (condition,), report_id, question, seed=run)
+
+    telemetry = TelemetryLog(output_root / "sweep.telemetry.jsonl")
+    with telemetry, SweepWriter(output_root, prompts, domains, runs) as writer:
+
+        def collect(index: int, job: Job, result: Extraction) -> None:
+            condition = job.conditions[0]
+            numbers = targets.pop((job.seed, job.report_id, condition, job.question))
+            writer.add(job.seed, condition, job.report_id, numbers, result)
+
+        asyncio.run(
+            analyse_reports_async(
+                jobs(),
+                model=model,
+                concurrency=concurrency,
+                cache=cache,
+                report_first=report_first,
+                scheduler=RequestScheduler(
+                    concurrency,
+                    max_retries=max_retries,
+                    tokens_per_minute=tokens_per_minute,
+                ),
+                telemetry=telemetry,
+                stream=stream,
+                endpoints=EndpointPool(endpoints) if endpoints else None,
+                on_result=collect,
+                temperature=temperature,
+                longest_first=longest_first,
+                context_tokens=context_tokens,
+            )
+        )
+
+    logging.info(
+        "Sweep of %d prompts x %d domains x %d runs: %d calls sent, %d duplicates "
+        "answered from them, %d rows written to %s",
+        len(prompts),
+        len(domains),
+        runs,
+        counts["calls"],
+        counts["deduplicated"],
+        writer.rows,
+        output_root,
+    )
+    if writer.failures:
+        logging.warning("%d prompt answers failed and were left empty", writer.failures)
+    log_summary(telemetry.summary())
+    if cache is not None:
+        logging.info("Response cache: %d hits, %d misses", cache.hits, cache.misses)
+
+
+# ---------------------------------------------------------------------------
+# ENTRY POINT ----------------------------------------------------------------
+# ---------------------------------------------------------------------------
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse CLI arguments."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--prompts", type=Path, required=True, help="Prompt table (CSV), one prompt per row."
+    )
+    parser.add_argument(
+        "--input",
+        type=Path,
+        required=True,
+        help="Path to the input XLSX, CSV or Parquet file containing anamnesis reports.",
+    )
+    parser.add_argument(
+        "--output-root",
+        type=Path,
+        required=True,
+        help="Folder receiving run<r>/prompts<a>-<b>_<Domain>.csv.",
+    )
+    parser.add_argument("--id-column", default="id", help="Report identifier column.")
+    parser.add_argument("--text-column", default="report", help="Report text column.")
+    parser.add_argument(
+        "--model",
+        default="llama-3.3-70b-instruct-q4km",
+        help="Model identifier for the ChatCompletion call.",
+    )
+    parser.add_argument(
+        "--domains",
+        nargs="+",
+        type=parse_domain,
+        default=[parse_domain(c) for c in CONDITIONS],
+        metavar="CONDITION[=NAME]",
+        help="Conditions to sweep (default: all of CONDITIONS), optionally with "
+        "the domain name used in the file names.",
+    )
+    parser.add_argument("--runs", type=int, default=3, help="Number of repeated runs.")
+    parser.add_argument(
+        "--temperature",
+        type=float,
+        default=0.0,
+        help="Sampling temperature; run r is sampled with seed r.",
+    )
+    parser.add_argument(
+        "--report-first",
+        action="store_true",
+        help="Place the report before the question so that questions about the "
+        "same report reuse the server's KV cache.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Maximum number of requests kept in flight over the whole sweep.",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help="Retries per request for timeouts and 5xx/429 errors.",
+    )
+    parser.add_argument(
+        "--tokens-per-minute",
+        type=int,
+        default=None,
+        help="Optional cap on prompt + completion tokens sent per minute.",
+    )
+    parser.add_argument(
+        "--stream", action="store_true", help="Stream responses to measure time to first byte."
+    )
+    parser.add_argument(
+        "--longest-first",
+        action="store_true",
+        help="Send the longest reports first to shorten the tail of the sweep.",
+    )
+    parser.add_argument(
+        "--context-tokens",
+        type=int,
+        default=None,
+        help="Context size of one server slot; longer reports are split and merged.",
+    )
+    parser.add_argument(
+        "--endpoints",
+        nargs="+",
+        default=None,
+        metavar="URL",
+        help="API base URLs of several servers to balance the sweep across.",
+    )
+    parser.add_argument(
+        "--cache-path",
+        type=Path,
+        default=DEFAULT_CACHE_PATH,
+        help="SQLite file holding the response cache.",
+    )
+    parser.add_argument(
+        "--cache-size-mb",
+        type=int,
+        default=DEFAULT_CACHE_SIZE_MB,
+        help="Size limit of the response cache in MiB.",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Disable the response cache.")
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="Logging verbosity",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Script entry-point executed by the CLI."""
+    load_dotenv()  # Read .env if present (does nothing otherwise)
+
+    args = parse_args()
+    logging.basicConfig(level=args.log_level, format="%(levelname)s: %(message)s")
+    configure_openai(api_base=args.endpoints[0] if args.endpoints else None)
+
+    cache = None
+    if not args.no_cache:
+        cache = ResponseCache(args.cache_path, args.cache_size_mb * 1024**2)
+    try:
+        sweep(
+            args.prompts,
+            args.input,
+            args.output_root,
+            args.model,
+            domains=args.domains,
+            runs=args.runs,
+            id_column=args.id_column,
+            text_column=args.text_column,
+            concurrency=args.concurrency,
+            report_first=args.report_first,
+            cache=cache,
+            max_retries=args.max_retries,
+            tokens_per_minute=args.tokens_per_minute,
+            stream=args.stream,
+            endpoints=args.endpoints,
+            temperature=args.temperature,
+            longest_first=args.longest_first,
+            context_tokens=args.context_tokens,
+        )
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+if __name__ == "__main__":
+    main()
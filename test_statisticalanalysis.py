@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+import statisticalanalysis as sa
+
+
+def test_identical_prompts_have_p_one():
+    rng = np.random.default_rng(0)
+    y_true = rng.random(50) < 0.3
+    y_pred = rng.random(50) < 0.5
+    pred = pd.concat([
+        pd.DataFrame({"id": range(50), "y_true": y_true, "y_pred": y_pred,
+                      "domain": "Depression", "prompt": prompt, "run": run})
+        for prompt in ("Prompt 1", "Prompt 2") for run in ("run1", "run2")
+    ], ignore_index=True)
+
+    indicators, averaging, _, cells = sa.encode_predictions(pred, sa.group_cols)
+    point_est = sa.point_estimates(indicators, averaging, cells)
+    pairs = sa.prompt_pairs(cells)
+    signs = {m: sa.SignCounter(pairs["a"], pairs["b"]) for m in sa.metric_funcs}
+    sa.bootstrap_cis(indicators, averaging, cells, {m: [signs[m]] for m in sa.metric_funcs},
+                     iterations=500)
+
+    out = sa.pairwise_pvalues(pairs, point_est, signs)
+    assert (out["diff"] == 0).all()
+    assert (out["p"] == 1).all()
+    assert out["q"].between(0, 1).all()